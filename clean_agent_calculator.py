@@ -0,0 +1,2604 @@
+import os
+import datetime
+from collections import namedtuple
+from operator import attrgetter
+from itertools import compress
+from array import array
+import sys
+import json
+from bisect import bisect_left
+from functools import lru_cache
+from contextlib import contextmanager
+
+def _import_tk():
+    # tkinter is only needed by the GUI; headless/batch runs never load it.
+    global tk, ttk, messagebox, scrolledtext, filedialog
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+
+# --------- OPTIONAL DEPENDENCIES ----------
+# Backends for batch math, Excel, PDF and Word. Nothing is ever pip-installed at runtime: availability is
+# probed with find_spec at startup (no import), the GUI warms the imports on an idle background thread, and
+# features whose backend is missing are disabled instead of failing on first click.
+OPTIONAL_BACKENDS = {
+    "openpyxl": {"package": "openpyxl", "feature": "Excel import/export", "warm": ("openpyxl",)},
+    "reportlab": {"package": "reportlab", "feature": "PDF export",
+                  "warm": ("reportlab.lib.pagesizes", "reportlab.lib.styles", "reportlab.lib.colors", "reportlab.platypus")},
+    "docx": {"package": "python-docx", "feature": "Word export", "warm": ("docx",)},
+    "numpy": {"package": "numpy", "feature": "batch calculation", "warm": ("numpy",)},
+}
+class MissingDependency(ImportError):
+    pass
+class DependencyManager:
+    def __init__(self, backends=OPTIONAL_BACKENDS):
+        import threading
+        self.backends = backends; self._found = {}; self._modules = {}; self._failed = {}
+        self._lock = threading.Lock(); self._warmer = None
+    def available(self, module):
+        # find_spec only locates the package on disk; it does not import it.
+        found = self._found.get(module)
+        if found is None:
+            import importlib.util
+            try: found = importlib.util.find_spec(module) is not None
+            except (ImportError, ValueError): found = False
+            self._found[module] = found
+        return found and module not in self._failed
+    def missing(self): return [module for module in self.backends if not self.available(module)]
+    def describe(self, module):
+        info = self.backends.get(module, {"package": module, "feature": module})
+        return f"{info['feature']} needs the '{info['package']}' package (pip install {info['package']})."
+    def require(self, module):
+        loaded = self._modules.get(module)
+        if loaded is not None: return loaded
+        if not self.available(module): raise MissingDependency(self.describe(module))
+        import importlib
+        try:
+            loaded = importlib.import_module(module)
+            for name in self.backends.get(module, {}).get("warm", ()): importlib.import_module(name)
+        except ImportError as e:
+            self._failed[module] = e; raise MissingDependency(f"{self.describe(module)} Import failed: {e}") from e
+        self._modules[module] = loaded
+        return loaded
+    def warm(self, modules=None):
+        for module in modules or self.backends:
+            if self.available(module):
+                try: self.require(module)
+                except MissingDependency: pass
+    def start_warming(self, modules=None):
+        # Daemon thread so a slow import never delays shutdown; a click that needs a module still warming just waits on the import lock.
+        import threading
+        with self._lock:
+            if self._warmer is None:
+                self._warmer = threading.Thread(target=self.warm, args=(modules,), name="fm200-warm-imports", daemon=True); self._warmer.start()
+        return self._warmer
+DEPENDENCIES = DependencyManager()
+def import_optional(module): return DEPENDENCIES.require(module)
+def install_and_import(package, import_name=None):
+    # Kept for existing callers: resolves through DEPENDENCIES and no longer installs anything.
+    return import_optional(import_name or package)
+
+# --------- AGENT/BOM DATA/DEFAULTS ----------
+AGENT_TABLES = {
+    "FM-200 (HFC-227ea)": {6.25: 0.47, 7.00: 0.58, 8.00: 0.70, 9.00: 0.85, 10.00: 1.00},
+    "Novec 1230 (FK-5-1-12)": {4.5: 0.41, 5.0: 0.47, 5.5: 0.52, 6.0: 0.57, 6.5: 0.62, 7.0: 0.67},
+    "High Pressure CO2": {34.0: 0.612}
+}
+AGENT_DEFAULTS = {
+    "FM-200 (HFC-227ea)": {"design_concentration": 7.0, "temperature": 20.0, "altitude": 0.0},
+    "Novec 1230 (FK-5-1-12)": {"design_concentration": 5.0, "temperature": 20.0, "altitude": 0.0},
+    "High Pressure CO2": {"design_concentration": 34.0, "temperature": 20.0, "altitude": 0.0}
+}
+# How an agent's table is applied. Agents not listed interpolate and take altitude/temperature corrections.
+AGENT_OPTIONS = {
+    "High Pressure CO2": {"interpolate": False, "default_factor": 0.612, "corrections": False}
+}
+REFERENCE_LINKS = [
+    ("NFPA 2001 Standard", "https://www.nfpa.org/codes-and-standards/all-codes-and-standards/list-of-codes-and-standards/detail?code=2001"),
+    ("3M Novec 1230 Guide", "https://multimedia.3m.com/mws/media/753982O/3m-novec-1230-fire-protection-fluid-engineering-guide.pdf"),
+    ("Kidde CO2 Manual", "https://kidde-fenwal.com/Lists/TechnicalManuals/CO2_Total_Flooding_System_Design_Manual.pdf"),
+]
+@lru_cache(maxsize=4096)
+def altitude_correction(altitude_m):
+    pressure = 101.325 * (1 - 2.25577e-5 * altitude_m)**5.25588
+    return 101.325 / pressure
+@lru_cache(maxsize=4096)
+def temperature_correction(temperature_C):
+    return 1.0 if temperature_C <= 20 else 1 + 0.013 * (temperature_C - 20)
+
+# --------- COMPILED AGENT TABLES ----------
+class CompiledAgentTable:
+    """An agent's factor table with breakpoints sorted and per-segment deltas precomputed.
+
+    Segment deltas are kept as (dx, dy) rather than a pre-divided slope so that
+    y0 + (dc - x0) * dy / dx rounds exactly like the original interpolation.
+    """
+    __slots__ = ("agent", "keys", "values", "dx", "dy", "exact", "interpolate", "default_factor", "corrections", "options")
+    def __init__(self, agent, table, interpolate=True, default_factor=None, corrections=True):
+        if not table: raise ValueError(f"Agent '{agent}' has no concentration factors.")
+        keys = sorted(table)
+        self.agent = agent; self.keys = tuple(keys); self.values = tuple(table[k] for k in keys)
+        self.dx = tuple(keys[i + 1] - keys[i] for i in range(len(keys) - 1))
+        self.dy = tuple(self.values[i + 1] - self.values[i] for i in range(len(keys) - 1))
+        self.exact = dict(table); self.interpolate = interpolate; self.corrections = corrections
+        self.default_factor = self.values[0] if default_factor is None else default_factor
+        self.options = None  # the AGENT_OPTIONS entry this was compiled from (set by AgentRegistry)
+    def factor(self, design_concentration):
+        if not self.interpolate: return self.exact.get(design_concentration, self.default_factor)
+        keys = self.keys
+        if design_concentration <= keys[0]: return self.values[0]
+        if design_concentration >= keys[-1]: return self.values[-1]
+        if design_concentration != design_concentration: raise KeyError("Design concentration out of range for interpolation.")
+        # First segment with keys[i] <= dc <= keys[i+1], same as the old linear scan.
+        i = bisect_left(keys, design_concentration) - 1
+        return self.values[i] + (design_concentration - keys[i]) * self.dy[i] / self.dx[i]
+
+def agent_tables_fingerprint():
+    return (tuple((agent, tuple(table.items())) for agent, table in AGENT_TABLES.items()),
+            tuple((agent, tuple(sorted(opts.items()))) for agent, opts in AGENT_OPTIONS.items()))
+
+class AgentRegistry:
+    """Compiled view of AGENT_TABLES/AGENT_OPTIONS.
+
+    Compiled once and reused by every calculation. Each lookup compares the
+    compiled table with the live one (a dict compare), so in-place edits to
+    AGENT_TABLES or AGENT_OPTIONS recompile the registry before the next use;
+    ensure_current() checks every agent at once.
+    """
+    def __init__(self):
+        self._compiled = {}; self._fingerprint = None; self.version = 0
+    def refresh(self):
+        compiled = {}
+        for agent, table in AGENT_TABLES.items():
+            options = AGENT_OPTIONS.get(agent)
+            compiled[agent] = CompiledAgentTable(agent, table, **(options or {})); compiled[agent].options = None if options is None else dict(options)
+        self._compiled = compiled
+        self._fingerprint = agent_tables_fingerprint(); self.version += 1
+    def ensure_current(self):
+        if self._fingerprint != agent_tables_fingerprint(): self.refresh()
+        return self
+    def __getitem__(self, agent):
+        compiled = self._compiled.get(agent)
+        if compiled is None or compiled.exact != AGENT_TABLES[agent] or compiled.options != AGENT_OPTIONS.get(agent):
+            if agent not in AGENT_TABLES: raise KeyError(agent)
+            self.refresh(); compiled = self._compiled[agent]
+        return compiled
+    def __contains__(self, agent): return agent in AGENT_TABLES
+    def agents(self): return list(AGENT_TABLES)
+
+AGENT_REGISTRY = AgentRegistry()
+
+AGENT_FILE_FORMAT = "clean-agent-tables"
+def load_agent_file(path, replace=False):
+    """Load agents from a JSON data file into AGENT_TABLES and recompile the registry.
+
+    Format: {"format": "clean-agent-tables", "version": 1, "agents": {name: {
+    "factors": {"7.0": 0.58, ...}, "defaults": {...}, "interpolate": true,
+    "default_factor": null, "corrections": true}}}. Returns the agent names loaded.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    agents = data.get("agents") if isinstance(data, dict) else None
+    if not isinstance(agents, dict) or not agents: raise ValueError(f"{path}: no 'agents' found.")
+    tables, defaults, options = {}, {}, {}
+    for name, spec in agents.items():
+        try: factors = {float(k): float(v) for k, v in spec["factors"].items()}
+        except (KeyError, TypeError, ValueError, AttributeError) as e: raise ValueError(f"{path}: agent '{name}' has invalid factors ({e}).")
+        if not factors: raise ValueError(f"{path}: agent '{name}' has no factors.")
+        tables[name] = factors
+        defaults[name] = {"design_concentration": min(factors), "temperature": 20.0, "altitude": 0.0, **spec.get("defaults", {})}
+        opts = {k: spec[k] for k in ("interpolate", "default_factor", "corrections") if k in spec}
+        CompiledAgentTable(name, factors, **opts)  # validate before touching the live tables
+        options[name] = opts
+    if replace: AGENT_TABLES.clear(); AGENT_DEFAULTS.clear(); AGENT_OPTIONS.clear()
+    for name in tables:
+        AGENT_TABLES[name] = tables[name]; AGENT_DEFAULTS[name] = defaults[name]
+        if options[name]: AGENT_OPTIONS[name] = options[name]
+        else: AGENT_OPTIONS.pop(name, None)
+    AGENT_REGISTRY.refresh()
+    return list(tables)
+def save_agent_file(path):
+    agents = {name: {"factors": {repr(k): v for k, v in table.items()}, "defaults": AGENT_DEFAULTS.get(name, {}), **AGENT_OPTIONS.get(name, {})}
+              for name, table in AGENT_TABLES.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format": AGENT_FILE_FORMAT, "version": 1, "agents": agents}, f, indent=2)
+
+# OEM hardware catalog. Same layout as an OEM catalog data file (see load_oem_catalog_file):
+# cylinders are [max agent kg, part number, description] sorted by capacity; the last one (capacity
+# null) takes anything larger. "lines" lays out the BOM: "cylinder"/"actuator" slots or fixed parts.
+OEM_CATALOG_FORMAT = "clean-agent-oem-catalog"
+OEM_CATALOG_VERSION = 1
+DEFAULT_OEM = "Viking"
+OEM_CATALOG = {
+    "format": OEM_CATALOG_FORMAT, "version": OEM_CATALOG_VERSION,
+    "oems": {
+        "Viking": {
+            "actuators": {"Electrical": ["07-235070-001", "Electrically Operated Actuator"],
+                          "Pneumatic": ["07-235070-002", "Pneumatic Actuator"],
+                          "Manual": ["07-235070-003", "Manual Actuator"]},
+            "systems": {"FM-200 (HFC-227ea)": {
+                "cylinders": [[52, "889099", "Viking FM-200 Cylinder"], [106, "889101", "Viking FM-200 Cylinder"],
+                              [147, "889104", "Viking FM-200 Cylinder"], [180, "910509", "Viking FM-200 Cylinder"],
+                              [None, "910510", "Viking FM-200 Cylinder"]],
+                "lines": ["cylinder", ["07-235068-001", "Cylinder Valve"], "actuator", ["07-235098-001", "Discharge Nozzle"]]}},
+        },
+        "Kidde": {
+            "actuators": {"Electrical": ["06-236240-001", "Electrically Operated Actuator"],
+                          "Pneumatic": ["06-236241-001", "Pneumatic Actuator"],
+                          "Manual": ["06-236242-001", "Manual Actuator"]},
+            "systems": {"FM-200 (HFC-227ea)": {
+                "cylinders": [[40, "06-236204-001", "Kidde 40L FM-200 Cylinder"], [106, "06-236212-001", "Kidde 106L FM-200 Cylinder"],
+                              [None, "06-236214-001", "Kidde 180L FM-200 Cylinder"]],
+                "lines": ["cylinder", ["06-236230-001", "Kidde FM-200 Valve"], "actuator", ["06-236250-001", "Discharge Nozzle"]]}},
+        },
+        "Tyco Hygood": {
+            "actuators": {"Electrical": ["304.205.010", "Electrical Actuator (Suppression Diode)"],
+                          "Pneumatic": ["304.209.004", "Pneumatic Actuator"],
+                          "Manual": ["304.209.002", "Manual Actuator"]},
+            "systems": {"FM-200 (HFC-227ea)": {
+                "cylinders": [[8, "303.205.015", "Hygood FM-200 8L Cylinder"], [16, "303.205.016", "Hygood FM-200 16L Cylinder"],
+                              [32, "303.205.017", "Hygood FM-200 32L Cylinder"], [52, "303.205.018", "Hygood FM-200 52L Cylinder"],
+                              [106, "303.205.019", "Hygood FM-200 106L Cylinder"], [147, "303.205.020", "Hygood FM-200 147L Cylinder"],
+                              [180, "303.205.021", "Hygood FM-200 180L Cylinder"], [None, "303.205.022", "Hygood FM-200 343L Cylinder"]],
+                "lines": ["cylinder", ["302.209.002", "Cylinder Valve (2” for 8-180L)"], "actuator",
+                          ["306.207.003", "Flexible Discharge Hose (2”)"], ["306.205.005", "Discharge Nozzle (typical)"]]}},
+        },
+    },
+}
+
+class BomLine(dict):
+    """A read-only BOM line. Lines are templates shared by every room that selects them."""
+    __slots__ = ()
+    def _read_only(self, *args, **kwargs): raise TypeError("BOM lines are shared templates; copy with dict(line) to edit.")
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+    def __reduce__(self): return (BomLine, (dict(self),))
+def bom_line(part_number, description, qty=1, unit="pcs"):
+    return BomLine(part_number=part_number, description=description, qty=qty, unit=unit)
+
+class OemSystem:
+    """One OEM's hardware for one agent: cylinder capacity breakpoints and the BOM line layout."""
+    __slots__ = ("thresholds", "cylinders", "layout", "actuators", "default_actuation", "_boms")
+    def __init__(self, cylinders, lines, actuators, default_actuation="Electrical"):
+        if not cylinders: raise ValueError("no cylinders")
+        capacities = [c[0] for c in cylinders[:-1]]
+        if any(c is None for c in capacities) or capacities != sorted(capacities): raise ValueError("cylinder capacities must be ascending")
+        self.thresholds = tuple(float(c) for c in capacities)
+        self.cylinders = tuple(bom_line(*c[1:]) for c in cylinders)
+        self.actuators = {k: bom_line(*v) for k, v in actuators.items()}
+        if "actuator" in lines and default_actuation not in self.actuators: raise ValueError(f"no '{default_actuation}' actuator")
+        self.layout = tuple(slot if isinstance(slot, str) else bom_line(*slot) for slot in lines)
+        self.default_actuation = default_actuation; self._boms = {}
+    def cylinder_index(self, agent_kg):
+        # agent_kg <= capacity picks the smallest cylinder that fits, i.e. a left bisect. NaN falls through to the largest.
+        if agent_kg != agent_kg: return len(self.thresholds)
+        return bisect_left(self.thresholds, agent_kg)
+    def bom(self, agent_kg, actuation_type):
+        key = (self.cylinder_index(agent_kg), actuation_type); lines = self._boms.get(key)
+        if lines is None:
+            slots = {"cylinder": self.cylinders[key[0]],
+                     "actuator": self.actuators.get(actuation_type) or self.actuators.get(self.default_actuation)}
+            lines = self._boms[key] = tuple(slots[slot] if isinstance(slot, str) else slot for slot in self.layout)
+        return lines
+
+class OemCatalogEntry:
+    __slots__ = ("oem", "systems")
+    def __init__(self, oem, spec):
+        self.oem = oem; actuators = spec.get("actuators", {}); default = spec.get("default_actuation", "Electrical")
+        try:
+            self.systems = {agent: OemSystem(system["cylinders"], system["lines"], system.get("actuators", actuators),
+                                             system.get("default_actuation", default))
+                            for agent, system in spec["systems"].items()}
+        except (KeyError, TypeError, ValueError) as e: raise ValueError(f"OEM '{oem}': invalid catalog entry ({e}).")
+    def supports(self, agent): return agent in self.systems
+    def bom(self, agent_kg, actuation_type, agent="FM-200 (HFC-227ea)"):
+        return self.systems[agent].bom(agent_kg, actuation_type)
+
+def oem_bom(oem, agent_kg, actuation_type, agent="FM-200 (HFC-227ea)"):
+    return list(OEM_BOM_DATABASES[oem]["catalog"].bom(agent_kg, actuation_type, agent))
+def get_viking_bom(agent_kg, actuation_type): return oem_bom("Viking", agent_kg, actuation_type)
+def get_kidde_bom(agent_kg, actuation_type): return oem_bom("Kidde", agent_kg, actuation_type)
+def get_hygood_bom(agent_kg, actuation_type): return oem_bom("Tyco Hygood", agent_kg, actuation_type)
+_BUILTIN_BOM_FUNCS = {"Viking": get_viking_bom, "Kidde": get_kidde_bom, "Tyco Hygood": get_hygood_bom}
+
+OEM_BOM_DATABASES = {}
+def register_oem_catalog(data, replace=False):
+    """Compile an OEM catalog (OEM_CATALOG layout) into OEM_BOM_DATABASES. Returns the OEM names registered."""
+    if not isinstance(data, dict) or data.get("format") != OEM_CATALOG_FORMAT: raise ValueError("Not an OEM catalog.")
+    if not isinstance(data.get("version"), int) or data["version"] > OEM_CATALOG_VERSION:
+        raise ValueError(f"Unsupported OEM catalog version {data.get('version')!r} (this build reads up to {OEM_CATALOG_VERSION}).")
+    entries = {oem: OemCatalogEntry(oem, spec) for oem, spec in data.get("oems", {}).items()}
+    if not entries: raise ValueError("OEM catalog has no OEMs.")
+    if replace: OEM_BOM_DATABASES.clear()
+    for oem, entry in entries.items():
+        func = _BUILTIN_BOM_FUNCS.get(oem) or (lambda agent_kg, actuation_type, _oem=oem: oem_bom(_oem, agent_kg, actuation_type))
+        OEM_BOM_DATABASES[oem] = {"func": func, "catalog": entry}
+    return list(entries)
+def load_oem_catalog_file(path, replace=False):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    try: return register_oem_catalog(data, replace)
+    except ValueError as e: raise ValueError(f"{path}: {e}")
+def save_oem_catalog_file(path, data=OEM_CATALOG):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+register_oem_catalog(OEM_CATALOG)
+
+def aggregate_bom(bom_lists):
+    """Total BOM lines by part number, in first-seen order.
+
+    Mergeable: aggregates are BOM lines themselves, so partial totals (e.g. one per project from portfolio
+    workers) combine with aggregate_bom(partials) in time proportional to the distinct parts, not the rooms.
+    """
+    lines = [item for bom in bom_lists for item in bom]
+    # Rooms share line templates, so count distinct line objects first and only then fold by part number.
+    uses = {}
+    for item in lines: uses[id(item)] = uses.get(id(item), 0) + 1
+    distinct = {id(item): item for item in lines}
+    parts = {}
+    for key, n in uses.items():
+        item = distinct[key]; part = parts.get(item["part_number"])
+        if part is None: parts[item["part_number"]] = [item["description"], item["qty"] * n, item["unit"]]
+        else: part[0] = item["description"]; part[1] += item["qty"] * n; part[2] = item["unit"]
+    return [{"part_number": k, "description": d, "qty": q, "unit": u} for k, (d, q, u) in parts.items()]
+
+# --------- CALCULATION ENGINE ----------
+AD_HOC_TABLES_KEPT = 256
+_AD_HOC_TABLES = {}
+ROOM_FIELDS = ("name", "length", "width", "height", "design_concentration", "altitude", "temperature",
+               "units", "agent", "actuation_type", "oem")
+class Room:
+    __slots__ = ROOM_FIELDS
+    def __init__(self, name, length, width, height, design_concentration, altitude, temperature,
+                 units="metric", agent="FM-200 (HFC-227ea)", actuation_type="Electrical", oem="Viking"):
+        self.name = name
+        self.length = length
+        self.width = width
+        self.height = height
+        self.design_concentration = design_concentration
+        self.altitude = altitude
+        self.temperature = temperature
+        self.units = units
+        self.agent = agent
+        self.actuation_type = actuation_type
+        self.oem = oem
+    def volume(self):
+        if self.units == "imperial":
+            return self.length * 0.3048 * self.width * 0.3048 * self.height * 0.3048
+        return self.length * self.width * self.height
+    def to_dict(self):
+        return {f: getattr(self, f) for f in ROOM_FIELDS}
+    @staticmethod
+    def from_dict(data):
+        return Room(**data)
+    def calculate_required_agent(self):
+        vol = self.volume()
+        compiled = AGENT_REGISTRY[self.agent]
+        factor = compiled.factor(self.design_concentration)
+        if not compiled.corrections:
+            required = vol * factor
+            alt_corr = temp_corr = 1.0
+        else:
+            alt_corr = altitude_correction(self.altitude)
+            temp_corr = temperature_correction(self.temperature)
+            required = vol * factor * alt_corr * temp_corr
+        return required, factor, alt_corr, temp_corr, vol
+    @staticmethod
+    def get_agent_factor(design_concentration, agent_table):
+        # Ad-hoc tables (registered agents go through AGENT_REGISTRY). Each table object is compiled once and reused
+        # while its contents compare equal, so edits in place are still picked up.
+        compiled = _AD_HOC_TABLES.get(id(agent_table))
+        if compiled is None or compiled.exact != agent_table:
+            if len(_AD_HOC_TABLES) >= AD_HOC_TABLES_KEPT: _AD_HOC_TABLES.clear()
+            compiled = _AD_HOC_TABLES[id(agent_table)] = CompiledAgentTable(None, agent_table)
+        return compiled.factor(design_concentration)
+    @staticmethod
+    def calculate_required_agent_batch(rooms): return calculate_required_agent_batch(rooms)
+
+# --------- BATCH (VECTORIZED) ENGINE ----------
+# Same arithmetic as Room.calculate_required_agent, evaluated column-wise so results match it bit for bit.
+def _agent_factor_batch(np, design_concentration, compiled):
+    dc = design_concentration
+    if not compiled.interpolate:
+        f = np.full(dc.shape, compiled.default_factor)
+        for k, v in compiled.exact.items(): f = np.where(dc == k, v, f)
+        return f
+    xs = np.array(compiled.keys, dtype=float); ys = np.array(compiled.values, dtype=float)
+    if len(xs) == 1: return np.full(dc.shape, ys[0])
+    # Scalar path picks the first segment with keys[i] <= dc <= keys[i+1], i.e. a left-sided search.
+    seg = np.clip(np.searchsorted(xs, dc, side="left") - 1, 0, len(xs) - 2)
+    dx = np.array(compiled.dx, dtype=float); dy = np.array(compiled.dy, dtype=float)
+    factor = ys[seg] + (dc - xs[seg]) * dy[seg] / dx[seg]
+    factor = np.where(dc <= xs[0], ys[0], factor)
+    factor = np.where(dc >= xs[-1], ys[-1], factor)
+    if np.isnan(dc).any(): raise KeyError("Design concentration out of range for interpolation.")
+    return factor
+def _unique_map(np, values, func):
+    # Projects reuse a handful of altitudes/temperatures: evaluate the scalar formula once per distinct value.
+    uniq, inverse = np.unique(values, return_inverse=True)
+    return np.array([func(float(v)) for v in uniq], dtype=float)[inverse.reshape(values.shape)]
+_BATCH_NUMERIC_FIELDS = ("length", "width", "height", "design_concentration", "altitude", "temperature")
+def _coded_column(np, values):
+    # (integer codes, categories) for a string column; RoomTable columns already arrive as (array('I'), categories).
+    if isinstance(values, tuple):
+        codes, categories = values
+        return (np.frombuffer(codes, dtype=np.uint32) if len(codes) else np.empty(0, dtype=np.uint32)), categories
+    categories = list(dict.fromkeys(values)); index = {value: code for code, value in enumerate(categories)}
+    return np.fromiter(map(index.__getitem__, values), dtype=np.uint32, count=len(values)), categories
+def calculate_required_agent_columns(length, width, height, design_concentration, altitude, temperature, units, agents):
+    """Result columns for rooms given column-wise. units/agents are sequences of strings or (codes, categories)
+    pairs as returned by RoomTable.columns(); masks are built on the integer codes, never by comparing strings."""
+    np = import_optional('numpy')
+    length, width, height = np.asarray(length, dtype=float), np.asarray(width, dtype=float), np.asarray(height, dtype=float)
+    design_concentration = np.asarray(design_concentration, dtype=float)
+    altitude, temperature = np.asarray(altitude, dtype=float), np.asarray(temperature, dtype=float)
+    (unit_codes, unit_names), (agent_codes, agent_names) = _coded_column(np, units), _coded_column(np, agents); n = len(length)
+    imperial = np.isin(unit_codes, [code for code, name in enumerate(unit_names) if name == "imperial"])
+    volume = np.where(imperial, length * 0.3048 * width * 0.3048 * height * 0.3048, length * width * height)
+    factor = np.empty(n); alt_corr = np.ones(n); temp_corr = np.ones(n); corrected = np.zeros(n, dtype=bool)
+    registry = AGENT_REGISTRY.ensure_current()
+    for code, agent in enumerate(agent_names):
+        rows = np.flatnonzero(agent_codes == code)
+        if not len(rows): continue  # a category no live row uses any more
+        compiled = registry[agent]
+        factor[rows] = _agent_factor_batch(np, design_concentration[rows], compiled)
+        if compiled.corrections: corrected[rows] = True
+    if corrected.any():
+        rows = np.flatnonzero(corrected); temperature = temperature[rows]
+        alt_corr[rows] = _unique_map(np, altitude[rows], altitude_correction)
+        temp_corr[rows] = np.where(temperature <= 20, 1.0, 1 + 0.013 * (temperature - 20))
+    required = volume * factor * alt_corr * temp_corr
+    return {"required": required, "factor": factor, "alt_corr": alt_corr, "temp_corr": temp_corr, "volume": volume}
+def calculate_required_agent_batch(rooms):
+    np = import_optional('numpy')
+    if isinstance(rooms, RoomTable):
+        columns = rooms.columns(); numeric = [np.frombuffer(columns[f], dtype=float) if len(columns[f]) else np.empty(0) for f in _BATCH_NUMERIC_FIELDS]
+        return calculate_required_agent_columns(*numeric, columns["units"], columns["agent"])
+    rooms = list(rooms); n = len(rooms)
+    numeric = [np.fromiter(map(attrgetter(f), rooms), dtype=float, count=n) for f in _BATCH_NUMERIC_FIELDS]
+    return calculate_required_agent_columns(*numeric, [r.units for r in rooms], [r.agent for r in rooms])
+
+# --------- ROOM STORE ----------
+# Rooms are kept column-wise: numeric fields in array('d'), the few distinct units/agent/actuation/OEM
+# strings as small integer codes, plus a name -> row index. Removed rows are tombstoned and compacted lazily.
+class DuplicateRoomError(ValueError):
+    def __init__(self, names):
+        self.names = names; shown = ", ".join(repr(n) for n in names[:5]) + (f" and {len(names) - 5} more" if len(names) > 5 else "")
+        super().__init__(f"Duplicate room name(s): {shown}. Room names must be unique.")
+class RoomTable:
+    NUMERIC_FIELDS = ("length", "width", "height", "design_concentration", "altitude", "temperature")
+    CODED_FIELDS = ("units", "agent", "actuation_type", "oem")
+    CHANGE_LOG_LIMIT = 100000
+    def __init__(self, rooms=()):
+        self.uid = object(); self.clear()
+        if rooms: self.extend(rooms)
+    def clear(self):
+        self._names = []; self._alive = bytearray(); self._index = {}; self._dead = 0
+        self.version = getattr(self, "version", 0) + 1; self._log = []; self._log_base = self.version
+        self._numeric = {f: array("d") for f in self.NUMERIC_FIELDS}
+        self._codes = {f: array("I") for f in self.CODED_FIELDS}
+        self._categories = {f: [] for f in self.CODED_FIELDS}; self._category_index = {f: {} for f in self.CODED_FIELDS}
+    def __len__(self): return len(self._index)
+    def __contains__(self, name): return name in self._index
+    def __iter__(self):
+        row_to_room = self._row_to_room
+        for row, alive in enumerate(self._alive):
+            if alive: yield row_to_room(row)
+    def __getitem__(self, name): return self._row_to_room(self._index[name])
+    def get(self, name, default=None):
+        row = self._index.get(name); return default if row is None else self._row_to_room(row)
+    def names(self): return list(self._index)
+    def copy(self):
+        other = RoomTable.__new__(RoomTable)
+        other._names = self._names[:]; other._alive = self._alive[:]; other._index = dict(self._index); other._dead = self._dead
+        other.uid = self.uid; other.version = self.version; other._log = self._log[:]; other._log_base = self._log_base
+        other._numeric = {f: col[:] for f, col in self._numeric.items()}; other._codes = {f: col[:] for f, col in self._codes.items()}
+        other._categories = {f: cats[:] for f, cats in self._categories.items()}
+        other._category_index = {f: dict(index) for f, index in self._category_index.items()}
+        return other
+    def _code(self, field, value):
+        index = self._category_index[field]; code = index.get(value)
+        if code is None: code = index[value] = len(self._categories[field]); self._categories[field].append(value)
+        return code
+    def _changed(self, name, added=False):
+        self.version += 1; self._log.append((name, added))
+        if len(self._log) > self.CHANGE_LOG_LIMIT: drop = len(self._log) // 2; del self._log[:drop]; self._log_base += drop
+    # Names touched since `version` -> True if (re)added since then; None when the log no longer reaches back that far.
+    def changes_since(self, version):
+        if version < self._log_base or version > self.version: return None
+        changes = {}
+        for name, added in self._log[version - self._log_base:]: changes[name] = changes.get(name, False) or added
+        return changes
+    def row_of(self, name): return self._index[name]
+    def _append(self, room):
+        self._index[room.name] = len(self._names); self._names.append(room.name); self._alive.append(1); self._changed(room.name, True)
+        for f in self.NUMERIC_FIELDS: self._numeric[f].append(float(getattr(room, f)))
+        for f in self.CODED_FIELDS: self._codes[f].append(self._code(f, getattr(room, f)))
+    def _row_to_room(self, row):
+        categories = self._categories; codes = self._codes; numeric = self._numeric
+        return Room(self._names[row], *(numeric[f][row] for f in self.NUMERIC_FIELDS),
+                    *(categories[f][codes[f][row]] for f in self.CODED_FIELDS))
+    def add(self, room):
+        if room.name in self._index: raise ValueError("Room name must be unique.")
+        self._append(room)
+    def extend(self, rooms):
+        # All or nothing: a name already in the table, or repeated in `rooms`, raises DuplicateRoomError before any row is added.
+        rooms = list(rooms); seen = set(); duplicates = []
+        for room in rooms:
+            if room.name in self._index or room.name in seen: duplicates.append(room.name)
+            seen.add(room.name)
+        if duplicates: raise DuplicateRoomError(duplicates)
+        for room in rooms: self._append(room)
+        return rooms
+    def update(self, room):
+        row = self._index.get(room.name)
+        if row is None: raise ValueError(f"Room '{room.name}' not found.")
+        for f in self.NUMERIC_FIELDS: self._numeric[f][row] = float(getattr(room, f))
+        for f in self.CODED_FIELDS: self._codes[f][row] = self._code(f, getattr(room, f))
+        self._changed(room.name)
+    def remove(self, name): return self.remove_many((name,)) == 1
+    def remove_many(self, names):
+        removed = 0
+        for name in names:
+            row = self._index.pop(name, None)
+            if row is None: continue
+            self._alive[row] = 0; self._dead += 1; removed += 1; self._changed(name)
+        if self._dead and self._dead * 4 >= len(self._names): self.compact()
+        return removed
+    def compact(self):
+        if not self._dead: return
+        alive = self._alive
+        self._names = list(compress(self._names, alive))
+        for f in self.NUMERIC_FIELDS: self._numeric[f] = array("d", compress(self._numeric[f], alive))
+        for f in self.CODED_FIELDS: self._codes[f] = array("I", compress(self._codes[f], alive))
+        self._alive = bytearray(b"\x01") * len(self._names); self._dead = 0
+        self._index = {name: row for row, name in enumerate(self._names)}
+    def columns(self):
+        # Live rows only: numeric fields as array('d'), coded fields as (array('I') codes, categories).
+        self.compact()
+        columns = {"name": self._names}; columns.update(self._numeric)
+        columns.update({f: (self._codes[f], self._categories[f]) for f in self.CODED_FIELDS})
+        return columns
+    def iter_fields(self, *fields):
+        # Tuples of the given fields for live rows, without materializing Room objects.
+        cols = [self._names if f == "name" else self._numeric[f] if f in self._numeric
+                else map(self._categories[f].__getitem__, self._codes[f]) for f in fields]
+        rows = zip(*cols)
+        return compress(rows, self._alive) if self._dead else rows
+    def iter_dicts(self):
+        categories = self._categories; codes = self._codes; numeric = self._numeric
+        for row, alive in enumerate(self._alive):
+            if not alive: continue
+            data = {"name": self._names[row]}
+            for f in self.NUMERIC_FIELDS: data[f] = numeric[f][row]
+            for f in self.CODED_FIELDS: data[f] = categories[f][codes[f][row]]
+            yield data
+
+class AgentCalculator:
+    def __init__(self): self._rooms = RoomTable(); self.results = ResultCache()
+    @property
+    def rooms(self): return self._rooms
+    @rooms.setter
+    def rooms(self, rooms): self._rooms = rooms if isinstance(rooms, RoomTable) else RoomTable(rooms)
+    def add_room(self, room): self._rooms.add(room)
+    def add_rooms(self, rooms): return self._rooms.extend(rooms)
+    def update_room(self, room): self._rooms.update(room)
+    def remove_room(self, room_name): self._rooms.remove(room_name)
+    def remove_rooms(self, room_names): return self._rooms.remove_many(room_names)
+    def clear(self): self._rooms.clear()
+    def calculate_batch(self): return calculate_required_agent_batch(self._rooms)
+    def report(self, project="", customer="", progress=None): return self.results.report(self._rooms, project, customer, progress=progress)
+    def bom(self, progress=None): return self.results.bom(self._rooms, progress)
+
+# --------- REPORT / BOM / FILE I/O (GUI-FREE) ----------
+EXCEL_REQUIRED_FIELDS = ["name", "length", "width", "height", "design_concentration", "altitude", "temperature", "units", "agent"]
+PROGRESS_EVERY = 1000
+# --------- REPORT MODEL ----------
+# Structured calculation result shared by the text, PDF, Word and Excel exporters.
+ReportRow = namedtuple("ReportRow", "name volume design_concentration factor alt_corr temp_corr required")
+REPORT_COLUMNS = ("Room", "Vol(m³)", "Design%", "Factor", "AltC", "TmpC", "Req (kg)")
+REPORT_TABLE_HEADER = f"{'Room':<14}{'Vol(m³)':>8}  {'Design%':>7}  {'Factor':>7}  {'AltC':>5}  {'TmpC':>5}  {'Req (kg)':>12}"
+REPORT_ROW_FORMAT = "%-14s%8.2f  %7.2f  %7.3f  %5.2f  %5.2f  %12.2f"  # applied to a ReportRow, in field order
+def report_row(name, design_concentration, result):
+    required, factor, alt_corr, temp_corr, vol = result
+    return ReportRow(name, vol, design_concentration, factor, alt_corr, temp_corr, required)
+def format_report_cells(row):
+    return (str(row.name), f"{row.volume:.2f}", f"{row.design_concentration:.2f}", f"{row.factor:.3f}",
+            f"{row.alt_corr:.2f}", f"{row.temp_corr:.2f}", f"{row.required:.2f}")
+class AgentSection:
+    __slots__ = ("agent", "rows", "total", "_text")
+    def __init__(self, agent, rows):
+        self.agent = agent; self.rows = rows; self._text = None
+        total = 0.0
+        for row in rows: total += row.required
+        self.total = total
+    def total_label(self): return f"Total for {self.agent}"
+    def to_text(self):
+        if self._text is None:
+            lines = [f"\nAGENT: {self.agent}", REPORT_TABLE_HEADER, "-" * 85]
+            lines.extend(map(REPORT_ROW_FORMAT.__mod__, self.rows))
+            lines.append("-" * 85); lines.append(f"{self.total_label():<62}{self.total:>12.2f} kg\n")
+            self._text = "\n".join(lines)
+        return self._text
+class CalculationReport:
+    title = "Clean Agent Fire Suppression Calculation Report"
+    def __init__(self, sections, project="", customer="", timestamp=None, references=REFERENCE_LINKS):
+        self.sections = list(sections); self.project = project; self.customer = customer
+        self.timestamp = timestamp or datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'); self.references = list(references)
+        grand_total = 0.0
+        for section in self.sections: grand_total += section.total
+        self.grand_total = grand_total
+    def room_count(self): return sum(len(section.rows) for section in self.sections)
+    def metadata(self):
+        out = [("Date", self.timestamp)]
+        if self.project: out.append(("Project", self.project))
+        if self.customer: out.append(("Customer", self.customer))
+        return out
+    def to_text(self):
+        head = "\n".join([self.title, *(f"{k}: {v}" for k, v in self.metadata()), "-" * 110])
+        tail = ["-" * 110, f"{'Grand Total (all agents)':<62}{self.grand_total:>12.2f} kg\n", "", "References:"]
+        tail.extend(f"- {title}: {url}" for title, url in self.references)
+        return "\n".join([head, *(section.to_text() for section in self.sections), "\n".join(tail)])
+    def to_dict(self):
+        return {"title": self.title, "timestamp": self.timestamp, "project": self.project, "customer": self.customer,
+                "agents": [{"agent": s.agent, "total_kg": s.total, "rooms": [r._asdict() for r in s.rows]} for s in self.sections],
+                "grand_total_kg": self.grand_total, "references": [{"title": t, "url": u} for t, u in self.references]}
+
+@lru_cache(maxsize=None)
+def _no_bom_lines(agent): return (bom_line("-", f"No BOM defined for {agent}.", "", ""),)
+def room_bom_entry(room, agent_kg):
+    return bom_entry(room.name, room.agent, getattr(room, "actuation_type", "Electrical"), getattr(room, "oem", DEFAULT_OEM), agent_kg)
+def oem_options(agent):
+    """OEMs with hardware for `agent`, each mapped to the actuation types its system offers. Empty means no BOM."""
+    options = {}
+    for oem, entry in OEM_BOM_DATABASES.items():
+        catalog = entry.get("catalog")
+        if catalog is not None and catalog.supports(agent): options[oem] = list(catalog.systems[agent].actuators)
+        elif catalog is None and agent == "FM-200 (HFC-227ea)": options[oem] = ["Electrical", "Pneumatic", "Manual"]
+    return options
+def bom_source(agent, actuation_type, oem):
+    """(OEM label, agent_kg -> BOM lines) for rooms with this agent, actuation type and OEM.
+
+    The label is the OEM whose hardware is used: a blank or unknown OEM falls back to DEFAULT_OEM and is labelled as
+    such, so its lines count in the project total. Rooms without hardware get a blank label.
+    """
+    if not OEM_BOM_DATABASES.get(oem): oem = DEFAULT_OEM
+    oem_entry = OEM_BOM_DATABASES[oem]; catalog = oem_entry.get("catalog")
+    if catalog is not None and catalog.supports(agent):
+        system = catalog.systems[agent]; return oem, lambda agent_kg: system.bom(agent_kg, actuation_type)
+    if catalog is None and agent == "FM-200 (HFC-227ea)":
+        func = oem_entry["func"]; return oem, lambda agent_kg: func(agent_kg, actuation_type)
+    lines = _no_bom_lines(agent); return "", lambda agent_kg: lines
+def bom_entry(name, agent, actuation_type, oem, agent_kg):
+    label, lines = bom_source(agent, actuation_type, oem)
+    return {"room": name, "oem": label, "bom": lines(agent_kg), "agent": agent}
+def build_calculation_report(rooms, project="", customer="", timestamp=None, progress=None):
+    return ResultCache().report(rooms, project, customer, timestamp, progress)
+def generate_project_bom(rooms, progress=None):
+    return ResultCache().bom(rooms, progress)
+
+# --------- RESULT CACHE ----------
+# Memoizes per-room results keyed on the inputs that feed them, following RoomTable's change log so only
+# edited rooms (and the subtotal of their agent) are recomputed. Agent table or OEM catalog edits drop the cache.
+def _oem_catalog_fingerprint(): return tuple((oem, entry["func"], entry.get("catalog")) for oem, entry in OEM_BOM_DATABASES.items())
+ROOM_CALC_FIELDS = ("length", "width", "height", "design_concentration", "altitude", "temperature", "units", "agent")
+room_calc_key = attrgetter(*ROOM_CALC_FIELDS)
+# Below this many rooms a from-scratch sync stays on the scalar path (and never imports NumPy for it).
+RESULT_CACHE_BATCH_ROOMS = 1000
+@contextmanager
+def gc_paused():
+    # Bulk builds allocate a few containers per room and no reference cycles; without this, the cyclic collector
+    # rescans the whole (growing) heap many times over and takes about half of a from-scratch sync.
+    import gc
+    enabled = gc.isenabled(); gc.disable()
+    try: yield
+    finally:
+        if enabled: gc.enable()
+class ResultCache:
+    def __init__(self):
+        import threading
+        self._lock = threading.RLock(); self.invalidate()
+    def invalidate(self):
+        with self._lock:
+            AGENT_REGISTRY.ensure_current(); self._tables = AGENT_REGISTRY.version; self._source = None
+            self._calc = {}      # name -> (calc key, ReportRow); the key ends with the agent
+            self._groups = {}    # agent -> [names in table order]
+            self._sections = {}  # agent -> AgentSection, rebuilt when a member changes
+            self._invalidate_bom()
+    def _invalidate_bom(self):
+        self._oems = _oem_catalog_fingerprint(); self._bom = {}; self._parts = {}; self._bom_dirty = set(); self._bom_full = True
+    def _compute(self, room):
+        return (room_calc_key(room), report_row(room.name, room.design_concentration, room.calculate_required_agent()))
+    def _sync_all_batch(self, rooms):
+        # From-scratch results straight from the table's columns and the batch engine, without a Room per row.
+        np = import_optional('numpy'); columns = rooms.columns(); names = columns["name"]
+        result = {k: v.tolist() for k, v in calculate_required_agent_batch(rooms).items()}
+        rows = map(ReportRow._make, zip(names, result["volume"], columns["design_concentration"], result["factor"],
+                                        result["alt_corr"], result["temp_corr"], result["required"]))
+        calc = dict(zip(names, zip(rooms.iter_fields(*ROOM_CALC_FIELDS), rows)))
+        codes, agents = columns["agent"]; codes = np.frombuffer(codes, dtype=np.uint32); groups = {}
+        for code, agent in enumerate(agents):
+            members = np.flatnonzero(codes == code).tolist()
+            if members: groups[agent] = list(map(names.__getitem__, members))
+        self._calc = calc; self._groups = groups
+    def _place(self, table, agent, name):
+        group = self._groups.setdefault(agent, []); self._sections.pop(agent, None)
+        if group and table.row_of(group[-1]) > table.row_of(name): return False
+        group.append(name); return True
+    def sync(self, rooms, progress=None):
+        with self._lock:
+            if self._tables != AGENT_REGISTRY.ensure_current().version: self.invalidate()
+            if self._oems != _oem_catalog_fingerprint(): self._invalidate_bom()
+            if self._source == (rooms.uid, rooms.version): return
+            try:
+                changed = rooms.changes_since(self._source[1]) if self._source and self._source[0] == rooms.uid else None
+                total = len(rooms) if changed is None else len(changed); done = 0
+                if changed is None:
+                    self._groups = {}; self._sections = {}; self._bom_full = True
+                    if len(rooms) >= RESULT_CACHE_BATCH_ROOMS and DEPENDENCIES.available("numpy"):
+                        if progress: progress(0, total)
+                        with gc_paused(): self._sync_all_batch(rooms)
+                        if progress: progress(total, total)
+                    else:
+                        old = self._calc; self._calc = calc = {}; groups = self._groups
+                        for row, fields in enumerate(rooms.iter_fields("name", *ROOM_CALC_FIELDS), start=1):
+                            name = fields[0]; key = fields[1:]; entry = old.get(name)
+                            if entry is None or entry[0] != key: entry = (key, report_row(name, key[3], Room(*fields).calculate_required_agent()))
+                            calc[name] = entry; groups.setdefault(key[7], []).append(name)
+                            if progress and row % PROGRESS_EVERY == 0: progress(row, total)
+                else:
+                    regroup = set(); added = []
+                    for name, readded in changed.items():
+                        room = rooms.get(name); old = self._calc.get(name); self._bom_dirty.add(name)
+                        if old and (room is None or readded):
+                            del self._calc[name]; self._groups[old[0][7]].remove(name); self._sections.pop(old[0][7], None); old = None
+                        if room is None: continue
+                        if old and old[0] == room_calc_key(room): continue
+                        entry = self._calc[name] = self._compute(room); self._sections.pop(room.agent, None)
+                        if old is None: added.append(name)
+                        elif old[0][7] != room.agent: self._groups[old[0][7]].remove(name); self._sections.pop(old[0][7], None); regroup.add(room.agent)
+                        done += 1
+                        if progress and done % PROGRESS_EVERY == 0: progress(done, total)
+                    for name in sorted(added, key=rooms.row_of):
+                        agent = self._calc[name][0][7]
+                        if agent not in regroup and not self._place(rooms, agent, name): regroup.add(agent)
+                    for agent in regroup: self._groups[agent] = [n for n in rooms.names() if self._calc[n][0][7] == agent]
+                    for agent in [a for a, group in self._groups.items() if not group]: del self._groups[agent]
+            except BaseException:
+                # A cancelled or failed sync leaves _calc/_groups half updated. Forget the source so the next sync takes the
+                # full path, which rebuilds the groups and reuses every cached entry whose inputs still match.
+                self._source = None; raise
+            self._source = (rooms.uid, rooms.version)
+    def report(self, rooms, project="", customer="", timestamp=None, progress=None):
+        if not isinstance(rooms, RoomTable): rooms = RoomTable(rooms)
+        with self._lock:
+            self.sync(rooms, progress)
+            sections = []
+            for agent in sorted(self._groups, key=lambda a: rooms.row_of(self._groups[a][0])):
+                section = self._sections.get(agent)
+                if section is None:
+                    calc = self._calc; section = self._sections[agent] = AgentSection(agent, [calc[name][1] for name in self._groups[agent]])
+                sections.append(section)
+            return CalculationReport(sections, project, customer, timestamp)
+    def _count_all_parts(self, entries):
+        # Rooms share BOM line tuples: count each distinct tuple once, then fold its lines by the number of uses.
+        uses = {}; distinct = {}
+        for entry in entries:
+            if entry["oem"]: bom = entry["bom"]; key = id(bom); uses[key] = uses.get(key, 0) + 1; distinct[key] = bom
+        parts = self._parts
+        for key, n in uses.items():
+            for item in distinct[key]:
+                part = parts.get(item["part_number"])
+                if part is None: part = parts[item["part_number"]] = [item["description"], 0, item["unit"]]
+                part[0] = item["description"]; part[1] += n * item["qty"]; part[2] = item["unit"]
+        for part_number in [k for k, part in parts.items() if part[1] == 0]: del parts[part_number]
+    def _count_parts(self, entry, sign):
+        if not entry["oem"]: return
+        for item in entry["bom"]:
+            part = self._parts.get(item["part_number"])
+            if part is None: part = self._parts[item["part_number"]] = [item["description"], 0, item["unit"]]
+            part[0] = item["description"]; part[1] += sign * item["qty"]; part[2] = item["unit"]
+            if part[1] == 0: del self._parts[item["part_number"]]
+    def _bom_for(self, name, agent, actuation_type, oem):
+        key = (self._calc[name][1].required, agent, actuation_type, oem); old = self._bom.get(name)
+        if old and old[0] == key: return
+        if old: self._count_parts(old[1], -1)
+        entry = bom_entry(name, agent, actuation_type, oem, key[0]); self._bom[name] = (key, entry); self._count_parts(entry, 1)
+    def bom(self, rooms, progress=None):
+        if not isinstance(rooms, RoomTable): rooms = RoomTable(rooms)
+        with self._lock:
+            self.sync(rooms, progress)
+            if self._bom_full:
+                old = self._bom; self._bom = bom = {}; self._parts = {}; calc = self._calc; sources = {}
+                with gc_paused():
+                    for fields in rooms.iter_fields("agent", "actuation_type", "oem", "name"):
+                        name = fields[3]; agent_kg = calc[name][1].required; key = (agent_kg, *fields[:3]); entry = old.get(name)
+                        if entry is None or entry[0] != key:
+                            source = sources.get(key[1:])
+                            if source is None: source = sources[key[1:]] = bom_source(*fields[:3])
+                            entry = (key, {"room": name, "oem": source[0], "bom": source[1](agent_kg), "agent": fields[0]})
+                        bom[name] = entry
+                self._count_all_parts(entry for _, entry in bom.values())
+                self._bom_full = False; self._bom_dirty.clear()
+            for name in self._bom_dirty:
+                room = rooms.get(name)
+                if room is not None: self._bom_for(room.name, room.agent, room.actuation_type, room.oem)
+                elif name in self._bom: self._count_parts(self._bom.pop(name)[1], -1)
+            self._bom_dirty.clear()
+            bom_per_room = [self._bom[name][1] for name in rooms.names()]
+            project_bom = [{"part_number": k, "description": d, "qty": q, "unit": u} for k, (d, q, u) in self._parts.items()]
+            return bom_per_room, project_bom
+
+def format_bom_report(bom_per_room, project_bom):
+    header = f"{'Part Number':<15} | {'Description':<50} | {'Qty':>5} | {'Unit':<4}\n"
+    def line(item): return f"{item['part_number']:<15} | {item['description']:<50} | {item['qty']:>5} | {item['unit']:<4}\n"
+    out = ["========= Room-by-Room BOM =========\n"]
+    for entry in bom_per_room:
+        out.append(f"\nRoom: {entry['room']} (Agent: {entry['agent']}" + (f", OEM: {entry['oem']}" if entry['oem'] else "") + ")\n")
+        out.append(header); out.append("-"*90+"\n"); out.extend(line(item) for item in entry["bom"])
+    out.append("\n========= Project BOM (Total) =========\n"); out.append(header); out.append("-"*90+"\n")
+    out.extend(line(item) for item in project_bom)
+    return "".join(out)
+PROJECT_METADATA_FIELDS = ("project_name", "customer_name")
+def read_project_file(file_path, progress=None):
+    """Rooms and metadata of a saved project, either a project database or a JSON project."""
+    if is_project_db(file_path):
+        with ProjectStore(file_path) as store: return store.load(progress), store.metadata()
+    with open(file_path, "r") as file: data = json.load(file)
+    metadata = {k: v for k, v in data.items() if k != "rooms"}
+    for field in PROJECT_METADATA_FIELDS: metadata.setdefault(field, "")
+    return [Room.from_dict(r) for r in data.get("rooms", [])], metadata
+def write_bom_text(file_path, bom_per_room, project_bom):
+    with open(file_path, "w", encoding="utf-8") as f: f.write(format_bom_report(bom_per_room, project_bom))
+def load_project_file(file_path): return read_project_file(file_path)[0]
+@contextmanager
+def replacing_file(file_path):
+    """Yield a temporary path next to file_path that replaces file_path only if the block completes.
+
+    A failed or cancelled write leaves any existing file untouched. SQLite's -wal/-shm side files are cleaned up too.
+    """
+    import uuid
+    directory, name = os.path.split(os.path.abspath(file_path))
+    temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        yield temp_path
+        if os.path.exists(file_path):
+            import shutil
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        for path in (temp_path, temp_path + "-wal", temp_path + "-shm"):
+            if os.path.exists(path): os.remove(path)
+def save_project_file(file_path, rooms, **metadata):
+    # Metadata keys go first so the rooms (the bulk of the file) stay at the end, as before.
+    data = {k: v for k, v in metadata.items() if v != "" or k not in PROJECT_METADATA_FIELDS}
+    data["rooms"] = list(rooms.iter_dicts()) if isinstance(rooms, RoomTable) else [room.to_dict() for room in rooms]
+    with replacing_file(file_path) as temp_path:
+        with open(temp_path, "w") as file: json.dump(data, file, indent=2)
+
+# --------- PROJECT DATABASE ----------
+PROJECT_DB_EXTENSIONS = (".fmproj", ".sqlite", ".db")
+PROJECT_DB_SCHEMA_VERSION = 1
+PROJECT_DB_PAGE = 5000
+SNAPSHOTS_KEPT = 10
+AUTOSAVE_MS = 3000
+PROJECT_FILETYPES = [("Project Database", "*.fmproj"), ("JSON Project", "*.json")]
+def is_project_db(file_path):
+    # A missing file raises FileNotFoundError: guessing from the extension would let a typo open (and create) an empty project.
+    with open(file_path, "rb") as f: return f.read(16) == b"SQLite format 3\x00"
+class ProjectStore:
+    """A project kept in an SQLite file: one row per room (in list order), metadata and report/BOM snapshots.
+
+    sync() follows RoomTable's change log and writes only the rooms touched since the previous sync, in one
+    transaction, so it is cheap enough to run as an autosave after every edit. Opening never creates a file: a
+    missing path raises FileNotFoundError unless create=True (as used by ProjectStore.create).
+    """
+    _INTERNAL_META = ("schema_version", "revision")
+    def __init__(self, file_path, create=False):
+        import sqlite3, threading
+        self.file_path = file_path; self._lock = threading.RLock(); self._source = None
+        if create: self._db = sqlite3.connect(file_path, check_same_thread=False)
+        else:
+            import errno
+            from urllib.request import pathname2url
+            if not os.path.exists(file_path): raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
+            self._db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(file_path))}?mode=rw", uri=True, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL"); self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = ", ".join(f"{f} {'REAL' if f in RoomTable.NUMERIC_FIELDS else 'TEXT'} NOT NULL" for f in ROOM_FIELDS[1:])
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS rooms (seq INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, {columns})")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, created TEXT NOT NULL, "
+                             "revision INTEGER NOT NULL, data TEXT NOT NULL)")
+            version = self._get("schema_version")
+            if version is None: self._put("schema_version", PROJECT_DB_SCHEMA_VERSION); self._put("revision", 0)
+            elif version > PROJECT_DB_SCHEMA_VERSION:
+                self._db.close(); raise ValueError(f"{file_path}: project database schema {version} is newer than this program supports.")
+        self._insert = f"INSERT INTO rooms ({', '.join(ROOM_FIELDS)}) VALUES ({', '.join('?' * len(ROOM_FIELDS))})"
+        self._update = f"UPDATE rooms SET {', '.join(f + ' = ?' for f in ROOM_FIELDS[1:])} WHERE name = ?"
+    @classmethod
+    def create(cls, file_path, rooms, **metadata):
+        """A new database at file_path holding `rooms`. Any existing file is replaced only once the new one is fully written."""
+        with replacing_file(file_path) as temp_path:
+            with cls(temp_path, create=True) as store: store.sync(rooms, **metadata); source = store._source
+        store = cls(file_path); store._source = source  # later syncs of the same table stay row-level
+        return store
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+    def close(self):
+        with self._lock: self._db.close()
+    def is_current(self, rooms):
+        with self._lock: return self._source == (rooms.uid, rooms.version)
+    def _get(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+    def _put(self, key, value): self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+    @property
+    def revision(self):
+        with self._lock: return self._get("revision", 0)
+    def metadata(self):
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM meta").fetchall()
+        metadata = {k: json.loads(v) for k, v in rows if k not in self._INTERNAL_META}
+        for field in PROJECT_METADATA_FIELDS: metadata.setdefault(field, "")
+        return metadata
+    def __len__(self):
+        with self._lock: return self._db.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+    def iter_pages(self, page_size=PROJECT_DB_PAGE):
+        # Keyset pagination on seq: each page is one short query, never the whole table in memory.
+        last = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(f"SELECT seq, {', '.join(ROOM_FIELDS)} FROM rooms WHERE seq > ? ORDER BY seq LIMIT ?",
+                                        (last, page_size)).fetchall()
+            if not rows: return
+            last = rows[-1][0]
+            yield [Room(*row[1:]) for row in rows]
+    def page(self, offset, limit):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(ROOM_FIELDS)} FROM rooms ORDER BY seq LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [Room(*row) for row in rows]
+    def load(self, progress=None):
+        """Read all rooms page by page into a RoomTable that later sync() calls write back incrementally."""
+        total = len(self); table = RoomTable()
+        for rooms in self.iter_pages():
+            table.extend(rooms)
+            if progress: progress(len(table), total)
+        self._source = (table.uid, table.version)
+        return table
+    def sync(self, rooms, **metadata):
+        """Write the rooms changed since the last sync (all rooms for a table this store has not seen). Returns rows written."""
+        if not isinstance(rooms, RoomTable): rooms = RoomTable(rooms)
+        with self._lock, self._db:
+            meta_changed = [(k, v) for k, v in metadata.items() if k not in self._INTERNAL_META and self._get(k) != v]
+            for k, v in meta_changed: self._put(k, v)
+            source = self._source; written = 0
+            if source == (rooms.uid, rooms.version):
+                if meta_changed: self._put("revision", self._get("revision", 0) + 1)
+                return 0
+            changed = rooms.changes_since(source[1]) if source and source[0] == rooms.uid else None
+            if changed is None:
+                self._db.execute("DELETE FROM rooms")
+                self._db.executemany(self._insert, rooms.iter_fields(*ROOM_FIELDS)); written = len(rooms)
+            else:
+                gone = [(name,) for name in changed if name not in rooms]
+                moved = sorted((name for name, added in changed.items() if added and name in rooms), key=rooms.row_of)
+                edited = [name for name, added in changed.items() if not added and name in rooms]
+                self._db.executemany("DELETE FROM rooms WHERE name = ?", gone + [(name,) for name in moved])
+                self._db.executemany(self._update, ((*(getattr(room, f) for f in ROOM_FIELDS[1:]), room.name) for room in map(rooms.__getitem__, edited)))
+                self._db.executemany(self._insert, (tuple(getattr(room, f) for f in ROOM_FIELDS) for room in map(rooms.__getitem__, moved)))
+                written = len(gone) + len(moved) + len(edited)
+            self._put("revision", self._get("revision", 0) + 1)
+            self._source = (rooms.uid, rooms.version)
+            return written
+    def save_snapshot(self, kind, data):
+        """Store a JSON-serializable snapshot ("report", "bom", ...) tagged with the current revision; old ones are pruned."""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO snapshots (kind, created, revision, data) VALUES (?, ?, ?, ?)",
+                             (kind, datetime.datetime.now().isoformat(timespec="seconds"), self._get("revision", 0), json.dumps(data)))
+            self._db.execute("DELETE FROM snapshots WHERE kind = ? AND id NOT IN (SELECT id FROM snapshots WHERE kind = ? ORDER BY id DESC LIMIT ?)",
+                             (kind, kind, SNAPSHOTS_KEPT))
+    def latest_snapshot(self, kind):
+        """(created, revision, data) of the newest snapshot of `kind`, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT created, revision, data FROM snapshots WHERE kind = ? ORDER BY id DESC LIMIT 1", (kind,)).fetchone()
+        return None if row is None else (row[0], row[1], json.loads(row[2]))
+def write_project_db(file_path, rooms, **metadata):
+    ProjectStore.create(file_path, rooms, **metadata).close()
+EXCEL_NUMERIC_FIELDS = ["length", "width", "height", "design_concentration", "altitude", "temperature"]
+EXCEL_IMPORT_CHUNK = 2000
+def iter_excel_rows(file_path):
+    load_workbook = import_optional('openpyxl').load_workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active; rows = ws.iter_rows(values_only=True)
+        headers = [str(cell).strip().lower() for cell in next(rows, ())]
+        missing = [f for f in EXCEL_REQUIRED_FIELDS if f not in headers]
+        if missing: raise ValueError(f"Excel file is missing columns: {', '.join(missing)}")
+        yield headers, ws.max_row
+        for row_no, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row): continue
+            yield row_no, row
+    finally:
+        wb.close()
+def _coerce_excel_chunk(chunk, col_map, errors):
+    # Column-wise coercion of one chunk of raw rows; returns {field: [values]} and drops rows that fail.
+    def cell(row, field):
+        i = col_map[field]; return row[i] if i < len(row) else None
+    bad = set(); columns = {}
+    for field in EXCEL_NUMERIC_FIELDS:
+        values = []
+        for row_no, row in chunk:
+            value = cell(row, field)
+            try: values.append(float(value))
+            except (TypeError, ValueError):
+                values.append(None)
+                if row_no not in bad: bad.add(row_no); errors.append((row_no, f"{field}: invalid number {value!r}"))
+        columns[field] = values
+    for field in ("name", "units", "agent"):
+        columns[field] = ["" if cell(row, field) is None else str(cell(row, field)).strip() for _, row in chunk]
+    for i, (row_no, _) in enumerate(chunk):
+        if row_no in bad: continue
+        name, units, agent = columns["name"][i], columns["units"][i], columns["agent"][i]
+        if not name: problem = "name: room name required"
+        elif units not in ("metric", "imperial"): problem = f"units: expected 'metric' or 'imperial', got {units!r}"
+        elif agent not in AGENT_TABLES: problem = f"agent: unknown agent {agent!r}"
+        else: continue
+        bad.add(row_no); errors.append((row_no, problem))
+    return columns, bad
+# Streams the active sheet and returns ([valid new rooms], [(row_number, problem), ...]).
+# `existing` is anything supporting `name in existing` (e.g. a RoomTable); clashing names are reported as duplicates.
+def read_rooms_from_excel(file_path, existing=(), progress=None):
+    rows = iter_excel_rows(file_path)
+    headers, total_rows = next(rows)
+    col_map = {h: i for i, h in enumerate(headers)}
+    names = set(); new_rooms = []; errors = []; done = 0
+    def flush(chunk):
+        columns, bad = _coerce_excel_chunk(chunk, col_map, errors)
+        for i, (row_no, _) in enumerate(chunk):
+            if row_no in bad: continue
+            data = {field: columns[field][i] for field in EXCEL_REQUIRED_FIELDS}
+            if data["name"] in names or data["name"] in existing: errors.append((row_no, f"name: duplicate room name {data['name']!r}")); continue
+            names.add(data["name"]); new_rooms.append(Room(**data))
+    chunk = []
+    for row_no, row in rows:
+        chunk.append((row_no, row))
+        if len(chunk) >= EXCEL_IMPORT_CHUNK:
+            flush(chunk); done += len(chunk); chunk = []
+            if progress: progress(done, total_rows and total_rows - 1)
+    if chunk: flush(chunk); done += len(chunk)
+    if progress: progress(done, total_rows and total_rows - 1)
+    errors.sort()
+    return new_rooms, errors
+def import_rooms_from_excel(file_path, calculator, progress=None):
+    new_rooms, errors = read_rooms_from_excel(file_path, calculator.rooms, progress)
+    return len(calculator.add_rooms(new_rooms)), errors
+def format_import_errors(errors, limit=20):
+    lines = [f"Row {row_no}: {problem}" for row_no, problem in errors[:limit]]
+    if len(errors) > limit: lines.append(f"... and {len(errors) - limit} more.")
+    return "\n".join(lines)
+BOM_ROOM_HEADER = ("Room", "Agent", "OEM", "Part Number", "Description", "Qty", "Unit")
+BOM_TOTAL_HEADER = ("Part Number", "Description", "Qty", "Unit")
+BOM_DELIMITED_EXTENSIONS = (".csv", ".tsv")
+def iter_bom_rows(bom_per_room, progress=None):
+    # Flat room-by-room rows straight from the BOM entries; nothing is buffered.
+    for done, entry in enumerate(bom_per_room, start=1):
+        room, agent, oem = entry["room"], entry["agent"], entry["oem"]
+        for item in entry["bom"]: yield (room, agent, oem, item["part_number"], item["description"], item["qty"], item["unit"])
+        if progress and done % PROGRESS_EVERY == 0: progress(done, len(bom_per_room))
+def iter_bom_total_rows(project_bom):
+    for item in project_bom: yield (item["part_number"], item["description"], item["qty"], item["unit"])
+def write_bom_excel(file_path, bom_per_room, project_bom, progress=None):
+    # Write-only workbook: rows stream to disk as they are appended, so memory stays flat with project size.
+    openpyxl = import_optional('openpyxl'); get_column_letter = openpyxl.utils.get_column_letter
+    wb = openpyxl.Workbook(write_only=True)
+    try:
+        for title, header, rows in (("BOM", BOM_ROOM_HEADER, iter_bom_rows(bom_per_room, progress)),
+                                    ("Project Total", BOM_TOTAL_HEADER, iter_bom_total_rows(project_bom))):
+            ws = wb.create_sheet(title)
+            for col in range(1, len(header) + 1): ws.column_dimensions[get_column_letter(col)].width = 22
+            ws.freeze_panes = "A2"; ws.append(header)
+            for row in rows: ws.append(row)
+    except BaseException:
+        # Finish the streamed sheets of a cancelled export so openpyxl is not left with half-open XML writers.
+        for ws in wb.worksheets:
+            if not ws.closed: ws.close()
+        raise
+    with replacing_file(file_path) as temp_path: wb.save(temp_path)
+def bom_totals_path(file_path):
+    stem, ext = os.path.splitext(file_path); return f"{stem}_project_total{ext}"
+def write_bom_delimited(file_path, bom_per_room, project_bom, progress=None):
+    """CSV (or TSV for .tsv) fast path: room-by-room rows in file_path, project totals next to it (see bom_totals_path).
+
+    Both files are written to temporary paths first; a cancelled or failed export leaves any existing files untouched.
+    """
+    import csv
+    delimiter = "\t" if file_path.lower().endswith(".tsv") else ","
+    with replacing_file(file_path) as rooms_path, replacing_file(bom_totals_path(file_path)) as totals_path:
+        for path, header, rows in ((rooms_path, BOM_ROOM_HEADER, iter_bom_rows(bom_per_room, progress)),
+                                   (totals_path, BOM_TOTAL_HEADER, iter_bom_total_rows(project_bom))):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, delimiter=delimiter); writer.writerow(header); writer.writerows(rows)
+def write_bom_file(file_path, bom_per_room, project_bom, progress=None):
+    if file_path.lower().endswith(BOM_DELIMITED_EXTENSIONS): return write_bom_delimited(file_path, bom_per_room, project_bom, progress)
+    return write_bom_excel(file_path, bom_per_room, project_bom, progress)
+PDF_ROWS_PER_TABLE = 40
+def write_report_text(file_path, report):
+    with open(file_path, "w", encoding="utf-8") as f: f.write(report.to_text())
+def write_report_pdf(file_path, report, progress=None):
+    import_optional('reportlab'); import reportlab.lib.pagesizes, reportlab.lib.styles, reportlab.lib.colors, reportlab.platypus
+    from xml.sax.saxutils import escape
+    A4 = reportlab.lib.pagesizes.A4; getSampleStyleSheet = reportlab.lib.styles.getSampleStyleSheet
+    SimpleDocTemplate = reportlab.platypus.SimpleDocTemplate; Paragraph = reportlab.platypus.Paragraph; Spacer = reportlab.platypus.Spacer
+    Table = reportlab.platypus.Table; TableStyle = reportlab.platypus.TableStyle; colors = reportlab.lib.colors
+    doc = SimpleDocTemplate(file_path, pagesize=A4); styles = getSampleStyleSheet(); elements = []
+    def para(txt): return Paragraph(txt, styles["Normal"])
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ])
+    elements.append(Paragraph(f"<b>{escape(report.title)}</b>", styles["Title"]))
+    for key, value in report.metadata(): elements.append(para(escape(f"{key}: {value}")))
+    total = report.room_count()
+    for section in report.sections:
+        elements.append(Spacer(1, 8)); elements.append(Paragraph(f"<b>AGENT: {escape(section.agent)}</b>", styles["Heading4"]))
+        # One small Table per chunk keeps layout linear; each chunk repeats the header row.
+        cells = [format_report_cells(row) for row in section.rows]
+        for i in range(0, len(cells), PDF_ROWS_PER_TABLE):
+            table = Table([REPORT_COLUMNS, *cells[i:i + PDF_ROWS_PER_TABLE]], repeatRows=1); table.setStyle(table_style); elements.append(table)
+        elements.append(Spacer(1, 4)); elements.append(para(f"<b>{escape(section.total_label())}: {section.total:.2f} kg</b>"))
+    elements.append(Spacer(1, 8)); elements.append(para(f"<b>Grand Total (all agents): {report.grand_total:.2f} kg</b>"))
+    elements.append(Spacer(1, 12)); elements.append(Paragraph("<b>References:</b>", styles["Normal"]))
+    for title, url in report.references: elements.append(para(escape(f"- {title}: {url}")))
+    if progress:
+        # Layout (doc.build) is the slow part: count report rows as each table, or page-split part of one, is drawn.
+        placed = [0]
+        def after_flowable(flowable):
+            if isinstance(flowable, Table): placed[0] += flowable._nrows - 1; progress(placed[0], total)
+        doc.afterFlowable = after_flowable
+    doc.build(elements)
+def write_report_word(file_path, report, progress=None):
+    Document = import_optional('docx').Document
+    doc = Document(); doc.add_heading(report.title, 0); total = report.room_count(); done = 0
+    for key, value in report.metadata(): doc.add_paragraph(f"{key}: {value}")
+    for section in report.sections:
+        doc.add_heading(f"AGENT: {section.agent}", level=2)
+        table = doc.add_table(rows=len(section.rows) + 1, cols=len(REPORT_COLUMNS))
+        rows = iter(table.rows)
+        for cell, text in zip(next(rows).cells, REPORT_COLUMNS): cell.text = text
+        for table_row, row in zip(rows, section.rows):
+            for cell, text in zip(table_row.cells, format_report_cells(row)): cell.text = text
+            done += 1
+            if progress and done % PROGRESS_EVERY == 0: progress(done, total)
+        doc.add_paragraph(f"{section.total_label()}: {section.total:.2f} kg", style='Intense Quote')
+    doc.add_paragraph(f"Grand Total (all agents): {report.grand_total:.2f} kg", style='Intense Quote')
+    doc.add_heading("References:", level=3)
+    for title, url in report.references: doc.add_paragraph(f"- {title}: {url}")
+    doc.save(file_path)
+def write_report_excel(file_path, report, progress=None):
+    openpyxl = import_optional('openpyxl'); Workbook = openpyxl.Workbook; get_column_letter = openpyxl.utils.get_column_letter
+    wb = Workbook(); ws = wb.active; ws.title = "Calculation"
+    ws.append([report.title])
+    for key, value in report.metadata(): ws.append([key, value])
+    ws.append([]); ws.append(["Agent", *REPORT_COLUMNS]); total = report.room_count(); done = 0
+    for section in report.sections:
+        for row in section.rows:
+            ws.append([section.agent, row.name, row.volume, row.design_concentration, row.factor, row.alt_corr, row.temp_corr, row.required])
+            done += 1
+            if progress and done % PROGRESS_EVERY == 0: progress(done, total)
+        ws.append([section.total_label(), None, None, None, None, None, None, section.total])
+    ws.append(["Grand Total (all agents)", None, None, None, None, None, None, report.grand_total])
+    for col in range(1, 9): ws.column_dimensions[get_column_letter(col)].width = 18
+    wb.save(file_path)
+
+# --------- INSTRUMENTATION ----------
+# Wall time, room count and memory for every pipeline stage (GUI and CLI). Always on and cheap: each stage records
+# the change in resident memory across it (rss_delta_bytes) and the process-wide peak so far (process_peak_rss_bytes,
+# which is not per stage). An opt-in mode (--trace/--profile) adds tracemalloc peaks, a Chrome trace timeline and
+# per-stage cProfile dumps.
+def _process_peak_rss_bytes():
+    try: import resource
+    except ImportError: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+def _rss_reader():
+    """A callable returning the current resident set size in bytes (None where the platform offers no cheap reading)."""
+    if os.path.exists("/proc/self/statm"):
+        page = os.sysconf("SC_PAGE_SIZE")
+        def rss():
+            with open("/proc/self/statm", "rb") as f: return int(f.read().split()[1]) * page
+        return rss
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [(name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        try: get_info = ctypes.WinDLL("psapi").GetProcessMemoryInfo; process = ctypes.windll.kernel32.GetCurrentProcess()
+        except (OSError, AttributeError): return lambda: None
+        def rss():
+            counters = Counters(); counters.cb = ctypes.sizeof(Counters)
+            return counters.WorkingSetSize if get_info(process, ctypes.byref(counters), counters.cb) else None
+        return rss
+    return lambda: None
+class Instrumentation:
+    HISTORY = 200
+    def __init__(self):
+        import threading, time
+        from collections import deque
+        self._clock = time.perf_counter; self._t0 = self._clock(); self._lock = threading.Lock(); self._threading = threading
+        self.records = deque(maxlen=self.HISTORY); self.trace_path = None; self.profile_stages = set(); self.profile_dir = "."
+        self._events = []; self._profiled = 0; self.memory = False; self._rss = _rss_reader()
+        self._measuring = {}  # id(record) -> True once another stage overlapped it (see stage())
+    def configure(self, trace_path=None, profile=(), profile_dir=None, memory=None):
+        """trace_path: Chrome trace JSON written by finish(). profile: stage names (or "all") to run under cProfile."""
+        self.trace_path = trace_path; self.profile_stages = set(profile or ()); self.profile_dir = profile_dir or "."
+        self.memory = bool(trace_path or profile) if memory is None else memory
+        if self.memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing(): tracemalloc.start()
+    def _profiler_for(self, name):
+        if not (name in self.profile_stages or "all" in self.profile_stages): return None
+        import cProfile
+        profiler = cProfile.Profile()
+        try: profiler.enable()
+        except ValueError: return None  # another stage on this thread is already being profiled
+        return profiler
+    @contextmanager
+    def stage(self, name, rooms=None):
+        """Time a stage. Yields its record so the caller can fill in "rooms" once it is known."""
+        record = {"stage": name, "rooms": rooms, "thread": self._threading.current_thread().name}
+        memory = self.memory
+        if memory:
+            # tracemalloc keeps one process-wide peak, so a stage only gets peak_bytes if no other stage (on any thread,
+            # or nested in it) ran at any point while it did. Overlapping stages record None rather than a wrong figure.
+            import tracemalloc
+            with self._lock:
+                overlapped = bool(self._measuring)
+                for key in self._measuring: self._measuring[key] = True
+                self._measuring[id(record)] = overlapped
+                if not overlapped: tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+        rss_before = self._rss(); profiler = self._profiler_for(name); start = self._clock(); ok = False
+        try:
+            yield record; ok = True
+        finally:
+            end = self._clock()
+            if profiler: profiler.disable()
+            peak_bytes = None; rss_after = self._rss()
+            if memory:
+                with self._lock:
+                    if not self._measuring.pop(id(record)): peak_bytes = tracemalloc.get_traced_memory()[1] - base
+            record.update(start=start - self._t0, seconds=end - start, ok=ok, peak_bytes=peak_bytes,
+                          rss_delta_bytes=None if rss_before is None or rss_after is None else rss_after - rss_before,
+                          process_peak_rss_bytes=_process_peak_rss_bytes())
+            with self._lock:
+                self.records.append(record)
+                if self.trace_path: self._events.append(record)
+                if profiler: self._profiled += 1; profile_path = os.path.join(self.profile_dir, f"{name}-{self._profiled}.prof")
+            if profiler: profiler.dump_stats(profile_path); record["profile"] = profile_path
+    def last(self, n=3):
+        with self._lock: return list(self.records)[-n:]
+    def summary(self, n=3):
+        parts = []
+        for r in reversed(self.last(n)):
+            text = f"{r['stage']} {r['seconds']:.2f}s"
+            if r["rooms"] is not None: text += f"/{r['rooms']:,} rooms"
+            text += _memory_text(r, "{:.0f}MB peak", "{:+.0f}MB RSS")
+            parts.append(text)
+        return " · ".join(parts)
+    def write_trace(self, file_path):
+        # Chrome trace event format: load in chrome://tracing or ui.perfetto.dev.
+        with self._lock: events = list(self._events)
+        threads = {}; pid = os.getpid()
+        trace = [{"name": r["stage"], "cat": "stage", "ph": "X", "pid": pid, "tid": threads.setdefault(r["thread"], len(threads) + 1),
+                  "ts": r["start"] * 1e6, "dur": r["seconds"] * 1e6,
+                  "args": {k: r[k] for k in ("rooms", "ok", "peak_bytes", "rss_delta_bytes", "process_peak_rss_bytes", "profile")
+                           if r.get(k) is not None}} for r in events]
+        trace += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}} for thread, tid in threads.items()]
+        with open(file_path, "w", encoding="utf-8") as f: json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    def finish(self):
+        if self.trace_path: self.write_trace(self.trace_path)
+def _memory_text(record, peak_format, rss_format):
+    """A stage's own memory figure: its tracemalloc peak when measured, else the RSS change across it."""
+    if record["peak_bytes"] is not None: return " " + peak_format.format(record["peak_bytes"] / 1e6)
+    if record["rss_delta_bytes"] is not None: return " " + rss_format.format(record["rss_delta_bytes"] / 1e6)
+    return ""
+INSTRUMENTS = Instrumentation()
+
+# --------- BACKGROUND TASKS ----------
+class TaskCancelled(Exception): pass
+# Runs jobs on a thread pool and delivers progress/results back on the Tk thread via master.after polling.
+# A job is called as job(progress); progress(done, total=None) raises TaskCancelled once the task is cancelled.
+class BackgroundTasks:
+    def __init__(self, master, max_workers=4, poll_ms=50):
+        import queue, threading, itertools
+        from concurrent.futures import ThreadPoolExecutor
+        self._Event = threading.Event; self._ids = itertools.count(1)
+        self.master = master; self.poll_ms = poll_ms; self._events = queue.Queue(); self._tasks = {}; self._polling = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fm200-task")
+    def submit(self, label, job, on_done=None, on_error=None, on_progress=None, key=None):
+        if key is not None: self.cancel(key=key)
+        task_id = next(self._ids); cancel = self._Event(); events = self._events
+        def progress(done, total=None):
+            if cancel.is_set(): raise TaskCancelled()
+            events.put(("progress", task_id, (done, total)))
+        future = self._executor.submit(job, progress)
+        self._tasks[task_id] = {"label": label, "key": key, "cancel": cancel, "future": future,
+                                "on_done": on_done, "on_error": on_error, "on_progress": on_progress}
+        future.add_done_callback(lambda f: events.put(("done", task_id, f)))
+        if not self._polling: self._polling = True; self.master.after(self.poll_ms, self._poll)
+        return task_id
+    def cancel(self, task_id=None, key=None):
+        for tid, task in list(self._tasks.items()):
+            if (task_id is None and key is None) or tid == task_id or (key is not None and task["key"] == key):
+                task["cancel"].set(); task["future"].cancel()
+    def running(self): return [task["label"] for task in self._tasks.values() if not task["cancel"].is_set()]
+    def shutdown(self): self.cancel(); self._executor.shutdown(wait=False, cancel_futures=True)
+    def _poll(self):
+        while not self._events.empty():
+            kind, task_id, payload = self._events.get_nowait(); task = self._tasks.get(task_id)
+            if task is None: continue
+            if kind == "progress":
+                if task["on_progress"] and not task["cancel"].is_set(): task["on_progress"](*payload)
+                continue
+            del self._tasks[task_id]
+            if task["cancel"].is_set() or payload.cancelled(): continue
+            error = payload.exception()
+            if isinstance(error, TaskCancelled): continue
+            if error is not None:
+                if task["on_error"]: task["on_error"](error)
+                continue
+            if task["on_done"]: task["on_done"](payload.result())
+        if self._tasks: self.master.after(self.poll_ms, self._poll)
+        else: self._polling = False
+
+class ToolTip(object):
+    def __init__(self, widget, text):
+        self.widget = widget; self.text = text; self.tipwindow = None
+        widget.bind("<Enter>", self.showtip); widget.bind("<Leave>", self.hidetip)
+    def showtip(self, event=None):
+        if self.tipwindow: return
+        x, y, _, _ = self.widget.bbox("insert") or (0, 0, 0, 0)
+        x = x + self.widget.winfo_rootx() + 40
+        y = y + self.widget.winfo_rooty() + 20
+        self.tipwindow = tw = tk.Toplevel(self.widget)
+        tw.wm_overrideredirect(True); tw.geometry(f"+{x}+{y}")
+        label = tk.Label(tw, text=self.text, background="#ffffe0", relief=tk.SOLID, borderwidth=1, font=("tahoma", "9", "normal")); label.pack(ipadx=1)
+    def hidetip(self, event=None):
+        tw = self.tipwindow; self.tipwindow = None;  tw and tw.destroy()
+
+# Rooms List controller: keeps filter/sort order on the RoomTable columns and only materializes one page of
+# rows as Tk items, applying inserts/deletes/updates/moves against what is already in the widget.
+class RoomListView:
+    COLUMNS = (("Name", "name"), ("Length", "length"), ("Width", "width"), ("Height", "height"), ("Units", "units"),
+               ("Design %", "design_concentration"), ("Altitude", "altitude"), ("Temp", "temperature"),
+               ("Agent", "agent"), ("Actuation", "actuation_type"), ("OEM", "oem"))
+    def __init__(self, treeview, calculator, page_size=500):
+        self.treeview = treeview; self.calculator = calculator; self.page_size = page_size; self.page = 0
+        self.sort_field = None; self.sort_descending = False; self.filter_text = ""; self.filter_field = None
+        self._order = []; self._order_key = None; self._shown = {}; self._shown_order = []
+    def _model_key(self):
+        rooms = self.calculator.rooms
+        return (id(rooms), rooms.version, self.sort_field, self.sort_descending, self.filter_text, self.filter_field)
+    def _compute_order(self):
+        columns = self.calculator.rooms.columns(); names = columns["name"]; rows = range(len(names))
+        def values(field):
+            col = columns[field]
+            if field in RoomTable.CODED_FIELDS: codes, categories = col; return [categories[c] for c in codes]
+            return col
+        if self.filter_text:
+            needle = self.filter_text.lower(); fields = [self.filter_field] if self.filter_field else [f for _, f in self.COLUMNS]
+            hits = set()
+            for field in fields:
+                if field in RoomTable.CODED_FIELDS:
+                    codes, categories = columns[field]
+                    matching = {i for i, c in enumerate(categories) if needle in str(c).lower()}
+                    if matching: hits.update(r for r in rows if codes[r] in matching)
+                else:
+                    col = columns[field]; hits.update(r for r in rows if needle in str(col[r]).lower())
+            rows = sorted(hits)
+        if self.sort_field:
+            key = values(self.sort_field)
+            rows = sorted(rows, key=key.__getitem__, reverse=self.sort_descending)
+        return [names[r] for r in rows]
+    def order(self):
+        key = self._model_key()
+        if key != self._order_key: self._order = self._compute_order(); self._order_key = key
+        return self._order
+    def page_count(self): return max(1, -(-len(self.order()) // self.page_size))
+    def page_range(self):
+        order = self.order(); start = self.page * self.page_size
+        return start + 1 if order else 0, min(start + self.page_size, len(order)), len(order)
+    def sort_by(self, field):
+        if self.sort_field == field: self.sort_descending = not self.sort_descending
+        else: self.sort_field = field; self.sort_descending = False
+    def set_filter(self, text, field=None): self.filter_text = text.strip(); self.filter_field = field; self.page = 0
+    def refresh(self):
+        order = self.order(); self.page = min(max(self.page, 0), self.page_count() - 1)
+        window = order[self.page * self.page_size:(self.page + 1) * self.page_size]
+        rooms = self.calculator.rooms; tree = self.treeview
+        desired = {name: tuple(getattr(room, f) for _, f in self.COLUMNS) for name, room in ((n, rooms[n]) for n in window)}
+        gone = [iid for iid in self._shown_order if iid not in desired]
+        if gone: tree.delete(*gone)
+        current = [iid for iid in self._shown_order if iid in desired]
+        in_order = current == [name for name in window if name in self._shown]
+        for index, name in enumerate(window):
+            values = desired[name]; old = self._shown.get(name)
+            if old is None: tree.insert("", index, iid=name, values=values)
+            else:
+                if old != values: tree.item(name, values=values)
+                if not in_order: tree.move(name, "", index)
+        self._shown = desired; self._shown_order = window
+    def selected_names(self): return list(self.treeview.selection())
+
+# --------- GUI ----------
+class ModernFM200App:
+    def __init__(self, master):
+        self.master = master
+        self.calculator = AgentCalculator()
+        self.bom_per_room = []
+        self.project_bom = []
+        self.latest_results = ""
+        self.latest_report = None
+        self.tasks = BackgroundTasks(master)
+        self.project_store = None  # open ProjectStore when the project lives in a project database
+        self._autosaved_metadata = None; self._quiet_tasks = {"Autosave"}
+        self.backend_buttons = []
+        self.setup_style(); self.setup_ui(); self.load_rooms_to_treeview(); self.flag_missing_backends()
+        self.master.after_idle(DEPENDENCIES.start_warming)
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.master.after(AUTOSAVE_MS, self.autosave)
+    def setup_style(self):
+        style = ttk.Style()
+        style.theme_use("clam")
+        style.configure("TNotebook.Tab", font=("Segoe UI", 12, "bold"), padding=[15, 8])
+        style.configure("TLabel", font=("Segoe UI", 11))
+        style.configure("TEntry", font=("Segoe UI", 11))
+        style.configure("TButton", font=("Segoe UI", 11, "bold"), padding=6)
+        style.configure("Treeview.Heading", font=("Segoe UI", 11, "bold"))
+        style.configure("Treeview", font=("Segoe UI", 10), rowheight=28)
+        style.map("TButton", foreground=[('pressed', 'white'), ('active', '#2E8B57')], background=[('pressed', '#1E3D59'), ('active', '#70A1FF')])
+    def setup_ui(self):
+        self.master.title("Clean Agent Calculator")
+        self.master.geometry("1300x900")
+        self.tabs = ttk.Notebook(self.master); self.tabs.pack(fill=tk.BOTH, expand=True, padx=10, pady=6)
+        # TAB 1: INPUT
+        input_tab = ttk.Frame(self.tabs); self.tabs.add(input_tab, text="Add Room")
+        input_frame = ttk.Frame(input_tab, padding=18); input_frame.pack(fill=tk.BOTH, expand=True)
+        col1 = ttk.Frame(input_frame); col2 = ttk.Frame(input_frame)
+        col1.pack(side=tk.LEFT, fill=tk.Y, expand=True, padx=15); col2.pack(side=tk.RIGHT, fill=tk.Y, expand=True, padx=15)
+        ttk.Label(col1, text="Room Name:").pack(anchor=tk.W, pady=3); self.room_name_entry = ttk.Entry(col1, width=24); self.room_name_entry.pack(pady=3, anchor=tk.W)
+        ToolTip(self.room_name_entry, "Room name must be unique.")
+        for lbl, ent in [("Length (m):", "length_entry"), ("Width (m):", "width_entry"), ("Height (m):", "height_entry")]:
+            ttk.Label(col1, text=lbl).pack(anchor=tk.W, pady=3); setattr(self, ent, ttk.Entry(col1, width=24)); getattr(self, ent).pack(pady=3, anchor=tk.W)
+        ttk.Label(col1, text="Units:").pack(anchor=tk.W, pady=3); self.unit_var = tk.StringVar(value="metric")
+        unit_select = ttk.Combobox(col1, textvariable=self.unit_var, values=["metric", "imperial"], width=22, state="readonly"); unit_select.pack(pady=3, anchor=tk.W)
+        ToolTip(unit_select, "Metric = meters, Imperial = feet.")
+        ttk.Label(col1, text="Design Concentration (%):").pack(anchor=tk.W, pady=3)
+        self.design_conc_entry = ttk.Entry(col1, width=24); self.design_conc_entry.pack(pady=3, anchor=tk.W)
+        ttk.Label(col1, text="Altitude (m):").pack(anchor=tk.W, pady=3); self.altitude_entry = ttk.Entry(col1, width=24); self.altitude_entry.pack(pady=3, anchor=tk.W)
+        ttk.Label(col1, text="Temperature (°C):").pack(anchor=tk.W, pady=3); self.temperature_entry = ttk.Entry(col1, width=24); self.temperature_entry.pack(pady=3, anchor=tk.W)
+        # AGENT TYPE + OEM
+        ttk.Label(col2, text="Agent Type:").pack(anchor=tk.W, pady=3); self.room_agent_var = tk.StringVar(value="FM-200 (HFC-227ea)")
+        self.room_agent_select = ttk.Combobox(col2, textvariable=self.room_agent_var, values=list(AGENT_TABLES.keys()), width=24, state="readonly")
+        self.room_agent_select.pack(pady=3, anchor=tk.W); self.room_agent_select.bind("<<ComboboxSelected>>", self.set_defaults_for_agent)
+        ToolTip(self.room_agent_select, "OEM and actuation choices follow the agent: only OEMs whose catalog has a system for it are offered.")
+        ttk.Label(col2, text="Actuation Type:").pack(anchor=tk.W, pady=3)
+        self.actuation_type_var = tk.StringVar(value="Electrical")
+        self.actuation_select = ttk.Combobox(col2, textvariable=self.actuation_type_var, values=["Electrical", "Pneumatic", "Manual"], width=24, state="readonly")
+        self.actuation_select.pack(pady=3, anchor=tk.W)
+        ttk.Label(col2, text="System OEM:").pack(anchor=tk.W, pady=3)
+        self.oem_var = tk.StringVar(value=DEFAULT_OEM)
+        self.oem_select = ttk.Combobox(col2, textvariable=self.oem_var, values=list(OEM_BOM_DATABASES.keys()), width=24, state="readonly")
+        self.oem_select.pack(pady=3, anchor=tk.W); self.oem_select.bind("<<ComboboxSelected>>", self.update_oem_choices)
+        self.update_oem_choices()
+        ttk.Label(col2, text="Project Name:").pack(anchor=tk.W, pady=3); self.project_name_entry = ttk.Entry(col2, width=26); self.project_name_entry.pack(pady=3, anchor=tk.W)
+        ttk.Label(col2, text="Customer Name:").pack(anchor=tk.W, pady=3); self.customer_name_entry = ttk.Entry(col2, width=26); self.customer_name_entry.pack(pady=3, anchor=tk.W)
+        ttk.Button(col2, text="Add Room", command=self.add_room).pack(pady=8, anchor=tk.W)
+        ttk.Button(col2, text="Update Room", command=self.update_room).pack(pady=4, anchor=tk.W)
+        ttk.Button(col2, text="Clear All Fields", command=self.clear_inputs).pack(pady=4, anchor=tk.W)
+        self.backend_button("openpyxl", col2, text="Import Rooms from Excel", command=self.import_from_excel).pack(pady=4, anchor=tk.W)
+        # TAB 2: ROOM LIST
+        rooms_tab = ttk.Frame(self.tabs); self.tabs.add(rooms_tab, text="Rooms List")
+        list_frame = ttk.Frame(rooms_tab, padding=10); list_frame.pack(fill=tk.BOTH, expand=True)
+        columns = tuple(col for col, _ in RoomListView.COLUMNS)
+        filter_row = ttk.Frame(list_frame); filter_row.pack(fill=tk.X, padx=8)
+        ttk.Label(filter_row, text="Filter:").pack(side=tk.LEFT); self.filter_entry = ttk.Entry(filter_row, width=30); self.filter_entry.pack(side=tk.LEFT, padx=4)
+        self.filter_column_var = tk.StringVar(value="All columns")
+        ttk.Combobox(filter_row, textvariable=self.filter_column_var, values=["All columns", *columns], width=14, state="readonly").pack(side=tk.LEFT, padx=4)
+        self.filter_entry.bind("<KeyRelease>", self.schedule_filter); self.filter_column_var.trace_add("write", self.schedule_filter); self._filter_job = None
+        self.treeview = ttk.Treeview(list_frame, columns=columns, show="headings", height=18); self.treeview.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.room_list = RoomListView(self.treeview, self.calculator)
+        for col, field in RoomListView.COLUMNS:
+            self.treeview.heading(col, text=col, command=lambda f=field: self.sort_rooms(f)); self.treeview.column(col, width=90 if col == "Name" else 70, anchor=tk.CENTER)
+        pager = ttk.Frame(list_frame); pager.pack(pady=3)
+        ttk.Button(pager, text="◀ Prev", command=lambda: self.change_page(-1)).pack(side=tk.LEFT, padx=4)
+        self.page_label = ttk.Label(pager, text=""); self.page_label.pack(side=tk.LEFT, padx=8)
+        ttk.Button(pager, text="Next ▶", command=lambda: self.change_page(1)).pack(side=tk.LEFT, padx=4)
+        ttk.Button(list_frame, text="Remove Selected", command=self.remove_room).pack(pady=3)
+        ttk.Button(list_frame, text="Save Project", command=self.save_project).pack(pady=3)
+        ttk.Button(list_frame, text="Load Project", command=self.open_project).pack(pady=3)
+        # TAB 3: CALC & BOM
+        bom_tab = ttk.Frame(self.tabs); self.tabs.add(bom_tab, text="Calculation & BOM")
+        # -------- Horizontal Button Bar --------
+        button_row = ttk.Frame(bom_tab)
+        button_row.pack(anchor=tk.W, padx=10, pady=8)
+        ttk.Button(button_row, text="Calculate Agent", command=self.calculate_agent).pack(side=tk.LEFT, padx=4)
+        ttk.Button(button_row, text="Generate BOM", command=self.generate_bom).pack(side=tk.LEFT, padx=4)
+        self.backend_button("numpy", button_row, text="Sensitivity Sweep", command=self.open_sweep_dialog).pack(side=tk.LEFT, padx=4)
+        self.backend_button("reportlab", button_row, text="Export Calculation to PDF", command=self.export_to_pdf).pack(side=tk.LEFT, padx=4)
+        self.backend_button("docx", button_row, text="Export Calculation to Word", command=self.export_to_word).pack(side=tk.LEFT, padx=4)
+        self.backend_button("openpyxl", button_row, text="Export Calculation to Excel", command=self.export_report_to_excel).pack(side=tk.LEFT, padx=4)
+        ttk.Button(button_row, text="Export BOM (Excel/CSV)", command=self.export_bom_to_excel).pack(side=tk.LEFT, padx=4)
+        # ---------------------------------------
+        self.bom_viewer = scrolledtext.ScrolledText(bom_tab, width=115, height=20, font=("Consolas", 11)); self.bom_viewer.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # TAB 4: CALC REPORT
+        result_tab = ttk.Frame(self.tabs); self.tabs.add(result_tab, text="Calculation Report")
+        self.result_box = scrolledtext.ScrolledText(result_tab, width=115, height=28, font=("Consolas", 11)); self.result_box.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        status_row = ttk.Frame(self.master); status_row.pack(side=tk.BOTTOM, fill=tk.X)
+        self.cancel_button = ttk.Button(status_row, text="Cancel", command=self.cancel_tasks, state=tk.DISABLED); self.cancel_button.pack(side=tk.RIGHT, padx=4)
+        self.progress_bar = ttk.Progressbar(status_row, length=220, mode="determinate"); self.progress_bar.pack(side=tk.RIGHT, padx=4)
+        self.timing_label = ttk.Label(status_row, text="", anchor=tk.E, font=("Segoe UI", 9), foreground="#555555"); self.timing_label.pack(side=tk.RIGHT, padx=6)
+        ToolTip(self.timing_label, "Most recent stage timings (newest first).")
+        self.status_bar = ttk.Label(status_row, text="Ready", anchor=tk.W, font=("Segoe UI", 10), background="#f2f2f2")
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.set_defaults_for_agent()
+    def status(self, message):
+        self.status_bar.config(text=message); self.timing_label.config(text=INSTRUMENTS.summary())
+    def backend_button(self, module, parent, **options):
+        button = ttk.Button(parent, **options); self.backend_buttons.append((module, button)); return button
+    def flag_missing_backends(self):
+        missing = DEPENDENCIES.missing()
+        for module, button in self.backend_buttons:
+            if module in missing: button.config(state=tk.DISABLED); ToolTip(button, DEPENDENCIES.describe(module))
+        features = [OPTIONAL_BACKENDS[m]["feature"] for m in missing if m != "numpy"]
+        self.status("Ready." + (f" Unavailable: {', '.join(features)}." if features else ""))
+    def require_backend(self, module):
+        if DEPENDENCIES.available(module): return True
+        messagebox.showerror("Feature Unavailable", DEPENDENCIES.describe(module)); return False
+    def run_task(self, label, job, on_done, key=None, stage=None, rooms=None, quiet=False):
+        # stage: instrumentation name; rooms: a count, or a function of the result when only known afterwards.
+        # quiet: housekeeping listed in _quiet_tasks (autosave): no progress bar or dialogs; failures go to the status bar.
+        def on_progress(done, total):
+            if total: self.progress_bar.config(mode="determinate", maximum=total, value=done); self.status(f"{label}... {done}/{total}")
+            else: self.status(f"{label}... {done}")
+        def finished():
+            if set(self.tasks.running()) <= self._quiet_tasks: self.progress_bar.stop(); self.progress_bar.config(mode="determinate", value=0); self.cancel_button.config(state=tk.DISABLED)
+        def done(result): finished(); on_done(result)
+        def error(e):
+            if not quiet: finished(); messagebox.showerror(f"{label} Failed", str(e))
+            self.status(f"{label} failed: {e}")
+        def timed(progress):
+            with INSTRUMENTS.stage(stage, None if callable(rooms) else rooms) as record:
+                result = job(progress)
+                if callable(rooms): record["rooms"] = rooms(result)
+                return result
+        if quiet: self.tasks.submit(label, timed if stage else job, on_done=on_done, on_error=error, key=key); return
+        self.tasks.submit(label, timed if stage else job, on_done=done, on_error=error, on_progress=on_progress, key=key)
+        self.progress_bar.config(mode="indeterminate"); self.progress_bar.start(15); self.cancel_button.config(state=tk.NORMAL)
+        self.status(f"{label}...")
+    def cancel_tasks(self):
+        self.tasks.cancel(); self.progress_bar.stop(); self.progress_bar.config(mode="determinate", value=0)
+        self.cancel_button.config(state=tk.DISABLED); self.status("Cancelled.")
+    def on_close(self):
+        self.tasks.shutdown()
+        if self.project_store:
+            try: self.project_store.sync(self.calculator.rooms, **self.project_metadata())
+            except Exception as e: messagebox.showerror("Autosave Failed", str(e))
+            self.project_store.close()
+        self.master.destroy()
+    def project_metadata(self):
+        return {"project_name": self.project_name_entry.get().strip(), "customer_name": self.customer_name_entry.get().strip()}
+    def autosave(self):
+        # Row-level sync of a table copy on a worker thread; edits made meanwhile are picked up by the next round.
+        store = self.project_store; rooms = self.calculator.rooms; metadata = self.project_metadata()
+        if store and not {"Save Project", "Autosave"} & set(self.tasks.running()) and not (store.is_current(rooms) and metadata == self._autosaved_metadata):
+            self._autosaved_metadata = metadata; rooms = rooms.copy()
+            self.run_task("Autosave", lambda progress: store.sync(rooms, **metadata), lambda _: None, key="autosave", quiet=True)
+        self.master.after(AUTOSAVE_MS, self.autosave)
+    def set_project_store(self, store):
+        if self.project_store and self.project_store is not store: self.project_store.close()
+        self.project_store = store
+    def update_oem_choices(self, event=None):
+        # Agents no loaded OEM catalog covers get no hardware BOM, so their OEM/actuation fields are disabled.
+        options = oem_options(self.room_agent_var.get())
+        self.oem_select.config(values=list(options), state="readonly" if options else "disabled")
+        if options and self.oem_var.get() not in options: self.oem_var.set(next(iter(options)))
+        actuations = options.get(self.oem_var.get(), [])
+        self.actuation_select.config(values=actuations, state="readonly" if actuations else "disabled")
+        if actuations and self.actuation_type_var.get() not in actuations: self.actuation_type_var.set(actuations[0])
+    def set_defaults_for_agent(self, event=None):
+        self.update_oem_choices()
+        agent = self.room_agent_var.get(); defaults = AGENT_DEFAULTS.get(agent)
+        if defaults:
+            self.design_conc_entry.delete(0, tk.END); self.design_conc_entry.insert(0, str(defaults["design_concentration"]))
+            self.temperature_entry.delete(0, tk.END); self.temperature_entry.insert(0, str(defaults["temperature"]))
+            self.altitude_entry.delete(0, tk.END); self.altitude_entry.insert(0, str(defaults["altitude"]))
+            self.status(f"Defaults set for {agent}.")
+    def clear_inputs(self):
+        for e in [self.room_name_entry, self.length_entry, self.width_entry, self.height_entry,
+                  self.design_conc_entry, self.altitude_entry, self.temperature_entry]:
+            e.delete(0, tk.END)
+        self.set_defaults_for_agent()
+    def load_rooms_to_treeview(self):
+        with INSTRUMENTS.stage("render_rooms", len(self.calculator.rooms)): self.room_list.refresh()
+        first, last, total = self.room_list.page_range()
+        self.page_label.config(text=f"Rooms {first}-{last} of {total}")
+    def change_page(self, delta): self.room_list.page += delta; self.load_rooms_to_treeview()
+    def sort_rooms(self, field):
+        self.room_list.sort_by(field)
+        for col, f in RoomListView.COLUMNS:
+            arrow = (" ▼" if self.room_list.sort_descending else " ▲") if f == self.room_list.sort_field else ""
+            self.treeview.heading(col, text=col + arrow)
+        self.load_rooms_to_treeview()
+    def schedule_filter(self, *args):
+        if self._filter_job: self.master.after_cancel(self._filter_job)
+        self._filter_job = self.master.after(200, self.apply_filter)
+    def apply_filter(self):
+        self._filter_job = None
+        self.room_list.set_filter(self.filter_entry.get(), dict(RoomListView.COLUMNS).get(self.filter_column_var.get()))
+        self.load_rooms_to_treeview()
+    def room_from_inputs(self):
+        name = self.room_name_entry.get().strip()
+        if not name: raise ValueError("Room name required.")
+        length = float(self.length_entry.get()); width = float(self.width_entry.get()); height = float(self.height_entry.get())
+        design_conc = float(self.design_conc_entry.get()); altitude = float(self.altitude_entry.get()); temperature = float(self.temperature_entry.get())
+        units = self.unit_var.get(); agent = self.room_agent_var.get(); actuation_type = self.actuation_type_var.get(); oem = self.oem_var.get()
+        if oem not in oem_options(agent): actuation_type = ""; oem = ""
+        return Room(name, length, width, height, design_conc, altitude, temperature, units, agent, actuation_type, oem)
+    def add_room(self):
+        try:
+            room = self.room_from_inputs()
+            with INSTRUMENTS.stage("add_room", 1): self.calculator.add_room(room)
+            self.load_rooms_to_treeview()
+            self.status(f"Room '{room.name}' added."); self.clear_inputs()
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e)); self.status(f"Failed to add room: {e}")
+    def update_room(self):
+        try:
+            room = self.room_from_inputs()
+            with INSTRUMENTS.stage("update_room", 1): self.calculator.update_room(room)
+            self.load_rooms_to_treeview()
+            self.status(f"Room '{room.name}' updated."); self.clear_inputs()
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e)); self.status(f"Failed to update room: {e}")
+    def remove_room(self):
+        selected = self.treeview.selection()
+        if not selected: messagebox.showerror("Error", "Please select a room to remove."); return
+        names = self.room_list.selected_names()
+        with INSTRUMENTS.stage("remove_rooms", len(names)): self.calculator.remove_rooms(names)
+        self.load_rooms_to_treeview()
+        self.status("Room(s) removed.")
+    def import_from_excel(self):
+        if not self.require_backend("openpyxl"): return
+        file_path = filedialog.askopenfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
+        if not file_path: return
+        existing = self.calculator.rooms.copy()
+        def done(result):
+            new_rooms, errors = result; table = self.calculator.rooms
+            # Rooms added by hand while the file was being read take precedence over the sheet.
+            clashes = [room.name for room in new_rooms if room.name in table]
+            if clashes: new_rooms = [room for room in new_rooms if room.name not in table]; errors = errors + [("-", f"name: room {name!r} was added while importing") for name in clashes]
+            added = len(self.calculator.add_rooms(new_rooms))
+            self.load_rooms_to_treeview(); self.status(f"{added} room(s) imported from Excel" + (f", {len(errors)} row(s) skipped." if errors else "."))
+            if errors: messagebox.showwarning("Excel Import", f"{len(errors)} row(s) were not imported:\n\n{format_import_errors(errors)}")
+        self.run_task("Excel Import", lambda progress: read_rooms_from_excel(file_path, existing, progress), done,
+                      stage="import_excel", rooms=lambda result: len(result[0]))
+    def save_project(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".fmproj", filetypes=PROJECT_FILETYPES)
+        if not file_path: return
+        rooms = self.calculator.rooms.copy(); metadata = self.project_metadata(); name = os.path.basename(file_path)
+        if not file_path.lower().endswith(PROJECT_DB_EXTENSIONS):
+            self.run_task("Save Project", lambda progress: save_project_file(file_path, rooms, **metadata),
+                          lambda _: self.status(f"Project exported as {name}."), stage="save_json", rooms=len(rooms))
+            return
+        if self.project_store and os.path.abspath(self.project_store.file_path) == os.path.abspath(file_path):
+            store = self.project_store
+            def job(progress): store.sync(rooms, **metadata); return store
+        else:
+            def job(progress): return ProjectStore.create(file_path, rooms, **metadata)
+        def done(store): self.set_project_store(store); self.status(f"Project saved as {name}; changes now save automatically.")
+        self.run_task("Save Project", job, done, stage="save_db", rooms=len(rooms))
+    def open_project(self):
+        file_path = filedialog.askopenfilename(defaultextension=".fmproj", filetypes=PROJECT_FILETYPES)
+        if not file_path: return
+        def job(progress):
+            if not is_project_db(file_path):
+                # Built here so a file with clashing room names fails the task (and is reported) instead of the Tk callback.
+                rooms, metadata = read_project_file(file_path); return (None, RoomTable(rooms), metadata)
+            store = ProjectStore(file_path)
+            try: return (store, store.load(progress), store.metadata())
+            except BaseException: store.close(); raise
+        def done(result):
+            store, rooms, metadata = result
+            self.calculator.rooms = rooms; self.set_project_store(store)
+            for entry, field in ((self.project_name_entry, "project_name"), (self.customer_name_entry, "customer_name")):
+                entry.delete(0, tk.END); entry.insert(0, metadata.get(field, ""))
+            self.load_rooms_to_treeview(); self.status(f"Project loaded from {os.path.basename(file_path)}.")
+        self.run_task("Open Project", job, done, key="project", stage="open_project", rooms=lambda result: len(result[1]))
+    def calculate_agent(self):
+        project = self.project_name_entry.get().strip(); customer = self.customer_name_entry.get().strip()
+        rooms = self.calculator.rooms.copy()
+        store = self.project_store
+        def job(progress):
+            report = self.calculator.results.report(rooms, project, customer, progress=progress)
+            if store: store.save_snapshot("report", report.to_dict())
+            return report, report.to_text()
+        def done(result):
+            self.latest_report, self.latest_results = result
+            with INSTRUMENTS.stage("render_report", self.latest_report.room_count()):
+                self.result_box.delete(1.0, tk.END); self.result_box.insert(tk.END, self.latest_results)
+            self.status("Calculation complete."); self.tabs.select(3)
+        self.run_task("Calculation", job, done, key="calculate", stage="calculate", rooms=len(rooms))
+    def generate_bom(self):
+        rooms = self.calculator.rooms.copy()
+        def done(result):
+            self.bom_per_room, self.project_bom = result
+            self.display_bom_viewer(); self.status("BOM generated and displayed.")
+        store = self.project_store
+        def job(progress):
+            bom_per_room, project_bom = self.calculator.results.bom(rooms, progress)
+            if store: store.save_snapshot("bom", {"rooms": bom_per_room, "project": project_bom})
+            return bom_per_room, project_bom
+        self.run_task("BOM Generation", job, done, key="bom", stage="bom", rooms=len(rooms))
+    def open_sweep_dialog(self):
+        if not self.require_backend("numpy"): return
+        dialog = tk.Toplevel(self.master); dialog.title("Sensitivity Sweep"); dialog.transient(self.master)
+        frame = ttk.Frame(dialog, padding=14); frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text="Values (e.g. 20 25 30) or ranges start:stop:count. Leave blank to keep each room's value.").grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 8))
+        entries = {}
+        for row, (key, label, default) in enumerate((("concentration", "Design Concentration (%):", ""),
+                                                     ("altitude", "Altitude (m):", "0:3000:31"), ("temperature", "Temperature (°C):", "0:50:26")), start=1):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=3)
+            entries[key] = ttk.Entry(frame, width=30); entries[key].grid(row=row, column=1, sticky=tk.W, pady=3); entries[key].insert(0, default)
+        def run():
+            try: grids = [parse_grid(entries[key].get().split()) for key in ("concentration", "altitude", "temperature")]
+            except ValueError as e: messagebox.showerror("Sweep", str(e)); return
+            dialog.destroy(); rooms = self.calculator.rooms.copy()
+            def done(result):
+                with INSTRUMENTS.stage("render_sweep", len(result.names)):
+                    self.result_box.delete(1.0, tk.END); self.result_box.insert(tk.END, result.to_text())
+                self.tabs.select(3); self.status(f"Sweep complete: {len(result.names)} rooms × {result.points} grid points.")
+            self.run_task("Sensitivity Sweep", lambda progress: sensitivity_sweep(rooms, *grids, progress=progress), done,
+                          key="sweep", stage="sweep", rooms=len(rooms))
+        ttk.Button(frame, text="Run Sweep", command=run).grid(row=4, column=1, sticky=tk.E, pady=(10, 0))
+    def display_bom_viewer(self):
+        with INSTRUMENTS.stage("render_bom", len(self.bom_per_room)):
+            self.bom_viewer.delete(1.0, tk.END); self.bom_viewer.insert(tk.END, format_bom_report(self.bom_per_room, self.project_bom))
+        self.tabs.select(2)
+    def export_bom_to_excel(self):
+        if not self.bom_per_room: messagebox.showerror("Error", "Please run Generate BOM first."); return
+        excel = DEPENDENCIES.available("openpyxl")
+        filetypes = ([("Excel Files", "*.xlsx")] if excel else []) + [("CSV Files", "*.csv"), ("Tab-separated Files", "*.tsv")]
+        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx" if excel else ".csv", filetypes=filetypes)
+        if not file_path: return
+        delimited = file_path.lower().endswith(BOM_DELIMITED_EXTENSIONS)
+        if not delimited and not self.require_backend("openpyxl"): return
+        bom_per_room, project_bom = self.bom_per_room, self.project_bom; name = os.path.basename(file_path)
+        done = (f"BOM exported as {name} and {os.path.basename(bom_totals_path(file_path))}." if delimited else f"BOM exported as {name}.")
+        self.run_task("BOM Export", lambda progress: write_bom_file(file_path, bom_per_room, project_bom, progress),
+                      lambda _: self.status(done), stage="export_bom_csv" if delimited else "export_bom_excel", rooms=len(bom_per_room))
+    def require_report(self):
+        if self.latest_report is None: messagebox.showerror("Error", "Please run Calculate Agent first."); return None
+        return self.latest_report
+    def export_to_pdf(self):
+        if not self.require_backend("reportlab"): return
+        report = self.require_report()
+        if report is None: return
+        file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf")])
+        if not file_path: return
+        self.run_task("PDF Export", lambda progress: write_report_pdf(file_path, report, progress),
+                      lambda _: self.status(f"PDF report saved as {os.path.basename(file_path)}."), stage="export_pdf", rooms=report.room_count())
+    def export_to_word(self):
+        if not self.require_backend("docx"): return
+        report = self.require_report()
+        if report is None: return
+        file_path = filedialog.asksaveasfilename(defaultextension=".docx", filetypes=[("Word Files", "*.docx")])
+        if not file_path: return
+        self.run_task("Word Export", lambda progress: write_report_word(file_path, report, progress),
+                      lambda _: self.status(f"Word report saved as {os.path.basename(file_path)}."), stage="export_word", rooms=report.room_count())
+    def export_report_to_excel(self):
+        if not self.require_backend("openpyxl"): return
+        report = self.require_report()
+        if report is None: return
+        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
+        if not file_path: return
+        self.run_task("Excel Export", lambda progress: write_report_excel(file_path, report, progress),
+                      lambda _: self.status(f"Calculation exported as {os.path.basename(file_path)}."), stage="export_report_excel", rooms=report.room_count())
+
+# --------- SENSITIVITY SWEEP ----------
+# Required agent for every room over a grid of design concentration × altitude × temperature, evaluated as one
+# rooms × grid array per chunk of rooms. Axes left out keep each room's own value. Factors and corrections come
+# from the same scalar formulas as Room.calculate_required_agent, so a one-point grid reproduces the report.
+SWEEP_CHUNK_CELLS = 4000000
+SWEEP_QUANTILES = (0.05, 0.5, 0.95)
+def parse_grid(values):
+    """["20", "25"] style values and "start:stop:count" ranges -> floats. None/empty -> None (room values)."""
+    if not values: return None
+    grid = []
+    for value in values:
+        if ":" in str(value):
+            start, stop, count = str(value).split(":"); start, stop, count = float(start), float(stop), int(count)
+            if count < 1: raise ValueError(f"Grid range '{value}' needs a positive count.")
+            grid += [start] if count == 1 else [start + (stop - start) * i / (count - 1) for i in range(count)]
+        else: grid.append(float(value))
+    return grid
+class SweepResult:
+    def __init__(self, names, agents, oems, grid, quantiles, minimum, maximum, room_quantiles, project_total, cylinders):
+        self.names = names; self.agents = agents; self.oems = oems; self.grid = grid; self.quantiles = tuple(quantiles)
+        self.minimum = minimum; self.maximum = maximum; self.room_quantiles = room_quantiles  # (rooms, len(quantiles))
+        self.project_total = project_total  # project agent total at each grid point
+        self.cylinders = cylinders  # per room: (cylinder at min, cylinder at max) BOM lines, or None without an OEM system
+    @property
+    def points(self):
+        points = 1
+        for values in self.grid.values(): points *= len(values) if values else 1
+        return points
+    def cylinder_counts(self):
+        # Worst case per room (cylinder at the maximum agent mass): what would have to be procured.
+        counts = {}
+        for cylinders in self.cylinders:
+            if cylinders is None: continue
+            line = cylinders[1]; entry = counts.setdefault(line["part_number"], [line["description"], 0]); entry[1] += 1
+        return [{"part_number": k, "description": d, "qty": q, "unit": "pcs"} for k, (d, q) in counts.items()]
+    def changed_rooms(self): return sum(1 for c in self.cylinders if c is not None and c[0] is not c[1])
+    def to_text(self):
+        np = import_optional("numpy")
+        q_labels = [f"q{q * 100:g}" for q in self.quantiles]
+        def axis(name):
+            values = self.grid[name]
+            return "room values" if not values else f"{min(values):g} .. {max(values):g} ({len(values)} values)"
+        total = self.project_total; total_q = np.quantile(total, self.quantiles) if len(total) else []
+        out = ["Sensitivity Sweep", f"Rooms: {len(self.names)}    Grid points: {self.points}",
+               f"Design concentration (%): {axis('design_concentration')}", f"Altitude (m): {axis('altitude')}",
+               f"Temperature (°C): {axis('temperature')}", "",
+               "Project total agent (kg): " + "  ".join([f"min {total.min():.2f}" if len(total) else "min -",
+                                                         *(f"{l} {v:.2f}" for l, v in zip(q_labels, total_q)),
+                                                         f"max {total.max():.2f}" if len(total) else "max -"]),
+               f"Rooms whose cylinder changes across the grid: {self.changed_rooms()}", "",
+               "Worst-case cylinders (at each room's maximum agent mass):"]
+        out += [f"  {c['part_number']:<15} {c['description']:<40} {c['qty']:>7}" for c in self.cylinder_counts()]
+        header = f"{'Room':<20} | {'Agent':<24} | {'Min kg':>9} | " + " | ".join(f"{l:>9}" for l in q_labels) + f" | {'Max kg':>9} | Cylinder (min -> max)"
+        out += ["", header, "-" * len(header)]
+        for i, name in enumerate(self.names):
+            cylinders = self.cylinders[i]
+            cyl = "-" if cylinders is None else cylinders[0]["part_number"] if cylinders[0] is cylinders[1] else f"{cylinders[0]['part_number']} -> {cylinders[1]['part_number']}"
+            out.append(f"{name:<20} | {self.agents[i]:<24} | {self.minimum[i]:>9.2f} | " + " | ".join(f"{v:>9.2f}" for v in self.room_quantiles[i])
+                       + f" | {self.maximum[i]:>9.2f} | {cyl}")
+        return "\n".join(out) + "\n"
+    def write_csv(self, file_path):
+        import csv
+        q_labels = [f"q{q * 100:g}_kg" for q in self.quantiles]
+        with open(file_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f); writer.writerow(["room", "agent", "oem", "min_kg", *q_labels, "max_kg", "cylinder_at_min", "cylinder_at_max"])
+            for i, name in enumerate(self.names):
+                cylinders = self.cylinders[i] or ({"part_number": ""}, {"part_number": ""})
+                writer.writerow([name, self.agents[i], self.oems[i], float(self.minimum[i]), *map(float, self.room_quantiles[i]),
+                                 float(self.maximum[i]), cylinders[0]["part_number"], cylinders[1]["part_number"]])
+def sensitivity_sweep(rooms, concentrations=None, altitudes=None, temperatures=None, quantiles=SWEEP_QUANTILES, progress=None):
+    np = import_optional("numpy")
+    table = rooms if isinstance(rooms, RoomTable) else RoomTable(rooms)
+    base = calculate_required_agent_batch(table); columns = table.columns(); n = len(table)
+    agent_codes, agent_names = columns["agent"]; agent_codes = np.frombuffer(agent_codes, dtype=np.uint32) if n else np.empty(0, dtype=np.uint32)
+    registry = AGENT_REGISTRY.ensure_current(); compiled = [registry[a] for a in agent_names]
+    corrected = np.array([c.corrections for c in compiled], dtype=bool)[agent_codes] if n else np.empty(0, dtype=bool)
+    # Each axis is (rooms, k): the swept values, or the room's own value as a single column.
+    if concentrations: factor = np.array([[c.factor(dc) for dc in concentrations] for c in compiled], dtype=float).reshape(len(compiled), -1)[agent_codes]
+    else: factor = base["factor"][:, None]
+    if altitudes: alt = np.where(corrected[:, None], np.array([altitude_correction(a) for a in altitudes])[None, :], 1.0)
+    else: alt = base["alt_corr"][:, None]
+    if temperatures: temp = np.where(corrected[:, None], np.array([temperature_correction(t) for t in temperatures])[None, :], 1.0)
+    else: temp = base["temp_corr"][:, None]
+    points = factor.shape[1] * alt.shape[1] * temp.shape[1]; volume = base["volume"]
+    minimum = np.empty(n); maximum = np.empty(n); room_q = np.empty((n, len(quantiles))); project_total = np.zeros(points)
+    step = max(1, SWEEP_CHUNK_CELLS // points)
+    for start in range(0, n, step):
+        sl = slice(start, min(n, start + step))
+        # Same association as the scalar path: ((volume * factor) * alt_corr) * temp_corr.
+        required = (volume[sl, None, None, None] * factor[sl, :, None, None] * alt[sl, None, :, None] * temp[sl, None, None, :]).reshape(-1, points)
+        minimum[sl] = required.min(axis=1); maximum[sl] = required.max(axis=1)
+        room_q[sl] = np.quantile(required, quantiles, axis=1).T; project_total += required.sum(axis=0)
+        if progress: progress(sl.stop, n)
+    names = columns["name"]; oem_codes, oem_names = columns["oem"]
+    oems = [oem_names[c] for c in oem_codes]; agents = [agent_names[c] for c in agent_codes]
+    cylinders = []
+    for i in range(n):
+        entry = OEM_BOM_DATABASES.get(oems[i]) or OEM_BOM_DATABASES[DEFAULT_OEM]; catalog = entry.get("catalog")
+        system = catalog.systems.get(agents[i]) if catalog is not None else None
+        if system is None: cylinders.append(None); continue
+        low, high = system.cylinder_index(float(minimum[i])), system.cylinder_index(float(maximum[i]))
+        cylinders.append((system.cylinders[low], system.cylinders[high]))
+    grid = {"design_concentration": concentrations, "altitude": altitudes, "temperature": temperatures}
+    return SweepResult(list(names), agents, oems, grid, quantiles, minimum, maximum, room_q, project_total, cylinders)
+
+# --------- PORTFOLIO ----------
+# Many saved projects at once: each is calculated in a worker process and returns only its totals and project
+# BOM, which aggregate_bom folds into one portfolio takeoff without revisiting per-room lines.
+def _portfolio_init(agents_path=None, oem_catalog_path=None):
+    # Workers may be spawned fresh, so data files loaded on the command line are loaded again here.
+    if agents_path: load_agent_file(agents_path)
+    if oem_catalog_path: load_oem_catalog_file(oem_catalog_path)
+def calculate_portfolio_project(file_path, output_dir=None):
+    """Calculate one saved project. Returns a picklable summary; errors are reported, not raised."""
+    try:
+        rooms, metadata = read_project_file(file_path)
+        rooms = rooms if isinstance(rooms, RoomTable) else RoomTable(rooms)
+        cache = ResultCache()
+        report = cache.report(rooms, metadata["project_name"], metadata["customer_name"])
+        bom_per_room, project_bom = cache.bom(rooms)
+        if output_dir:
+            stem = os.path.join(output_dir, os.path.splitext(os.path.basename(file_path))[0])
+            write_report_text(stem + ".report.txt", report); write_bom_text(stem + ".bom.txt", bom_per_room, project_bom)
+        return {"file": file_path, "project_name": metadata["project_name"], "customer_name": metadata["customer_name"],
+                "rooms": len(rooms), "agent_kg": {section.agent: section.total for section in report.sections},
+                "total_kg": report.grand_total, "bom": project_bom}
+    except Exception as e:
+        return {"file": file_path, "error": f"{type(e).__name__}: {e}"}
+def run_portfolio_projects(file_paths, output_dir=None, workers=None, agents_path=None, oem_catalog_path=None, progress=None):
+    """Calculate every project on a process pool and merge them. Returns (per-project summaries, agent totals, merged BOM)."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    file_paths = list(file_paths); results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_portfolio_init, initargs=(agents_path, oem_catalog_path)) as pool:
+        futures = [pool.submit(calculate_portfolio_project, path, output_dir) for path in file_paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result(); results[result["file"]] = result
+            if progress: progress(done, len(futures), result)
+    projects = [results[path] for path in file_paths]; ok = [p for p in projects if "error" not in p]
+    agent_kg = {}
+    for p in ok:
+        for agent, kg in p["agent_kg"].items(): agent_kg[agent] = agent_kg.get(agent, 0.0) + kg
+    return projects, agent_kg, aggregate_bom(p["bom"] for p in ok)
+def format_portfolio_takeoff(projects, agent_kg, bom, timestamp=None):
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ok = [p for p in projects if "error" not in p]; failed = [p for p in projects if "error" in p]
+    out = ["Portfolio Material Takeoff", f"Date: {timestamp}",
+           f"Projects: {len(ok)}" + (f" ({len(failed)} failed)" if failed else "") + f"    Rooms: {sum(p['rooms'] for p in ok)}", "-" * 90,
+           f"{'Project File':<40} | {'Project':<25} | {'Rooms':>7} | {'Agent (kg)':>10}", "-" * 90]
+    for p in ok:
+        out.append(f"{os.path.basename(p['file']):<40} | {p['project_name']:<25} | {p['rooms']:>7} | {p['total_kg']:>10.2f}")
+    for p in failed: out.append(f"{os.path.basename(p['file']):<40} | FAILED: {p['error']}")
+    out += ["-" * 90, "Agent totals:"] + [f"  {agent:<38} {kg:>14.2f} kg" for agent, kg in agent_kg.items()]
+    out += ["", "========= Portfolio BOM (Total) =========", f"{'Part Number':<15} | {'Description':<50} | {'Qty':>7} | {'Unit':<4}", "-" * 90]
+    out += [f"{item['part_number']:<15} | {item['description']:<50} | {item['qty']:>7} | {item['unit']:<4}" for item in bom]
+    return "\n".join(out) + "\n"
+def write_portfolio_outputs(output_dir, projects, agent_kg, bom):
+    import csv
+    with open(os.path.join(output_dir, "portfolio_takeoff.txt"), "w", encoding="utf-8") as f: f.write(format_portfolio_takeoff(projects, agent_kg, bom))
+    with open(os.path.join(output_dir, "portfolio_takeoff.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f); writer.writerow(["Part Number", "Description", "Qty", "Unit"])
+        writer.writerows((item["part_number"], item["description"], item["qty"], item["unit"]) for item in bom)
+    summary = {"projects": [{k: v for k, v in p.items() if k != "bom"} for p in projects], "agent_kg": agent_kg, "bom": bom}
+    with open(os.path.join(output_dir, "portfolio.json"), "w", encoding="utf-8") as f: json.dump(summary, f, indent=2)
+def run_portfolio(args):
+    import glob
+    paths = sorted(p for pattern in args.pattern for p in glob.glob(os.path.join(args.directory, pattern)))
+    if not paths: print(f"Error: no projects matching {' '.join(args.pattern)} in {args.directory}.", file=sys.stderr); return 2
+    output_dir = args.output or os.path.join(args.directory, "portfolio"); os.makedirs(output_dir, exist_ok=True)
+    def progress(done, total, result):
+        status = f"FAILED: {result['error']}" if "error" in result else f"{result['rooms']} rooms, {result['total_kg']:.2f} kg"
+        sys.stderr.write(f"[{done}/{total}] {os.path.basename(result['file'])}: {status}\n")
+    with INSTRUMENTS.stage("portfolio", len(paths)):
+        projects, agent_kg, bom = run_portfolio_projects(paths, None if args.no_project_files else output_dir, args.workers,
+                                                         args.agents, args.oem_catalog, progress)
+    write_portfolio_outputs(output_dir, projects, agent_kg, bom)
+    failed = sum("error" in p for p in projects)
+    print(f"{len(projects) - failed} project(s) calculated" + (f", {failed} failed" if failed else "") + f"; takeoff written to {output_dir}.")
+    return 1 if failed else 0
+
+# --------- BENCHMARKS ----------
+# Synthetic projects and a stage-by-stage harness for the engine, file I/O and exports. Results are keyed
+# "stage@rooms" so a saved baseline can be compared against later runs of the same sizes.
+BENCH_FORMAT = "clean-agent-bench"
+BENCH_ACTUATIONS = ("Electrical", "Pneumatic", "Manual")
+def generate_synthetic_project(n, seed=0):
+    """n reproducible rooms mixing every agent, OEM, unit system and actuation type at realistic sizes."""
+    import random
+    rng = random.Random(seed); agents = list(AGENT_TABLES); oems = list(OEM_BOM_DATABASES)
+    altitudes = (0.0, 0.0, 150.0, 500.0, 1200.0, 2200.0); temperatures = (15.0, 20.0, 20.0, 25.0, 30.0, 40.0)
+    width = len(str(n))
+    rooms = []
+    for i in range(n):
+        agent = agents[rng.randrange(len(agents))]; table = AGENT_TABLES[agent]; keys = sorted(table)
+        dc = keys[rng.randrange(len(keys))] if rng.random() < 0.5 else round(rng.uniform(keys[0], keys[-1]), 2)
+        units = "imperial" if rng.random() < 0.25 else "metric"; scale = 3.28084 if units == "imperial" else 1.0
+        rooms.append(Room(f"Room {i:0{width}d}", round(rng.uniform(2, 40) * scale, 2), round(rng.uniform(2, 30) * scale, 2),
+                          round(rng.uniform(2.4, 6) * scale, 2), dc, altitudes[rng.randrange(6)], temperatures[rng.randrange(6)],
+                          units, agent, BENCH_ACTUATIONS[rng.randrange(3)], oems[rng.randrange(len(oems))]))
+    return rooms
+
+# Each stage takes the shared context and returns (rooms processed, thunk). Only the thunk is timed.
+def _bench_generate(ctx): return ctx["n"], lambda: generate_synthetic_project(ctx["n"], ctx["seed"])
+def _bench_calculate(ctx):
+    rooms = ctx["rooms"]; return len(rooms), lambda: [room.calculate_required_agent() for room in rooms]
+def _bench_agent_factor(ctx):
+    pairs = [(room.design_concentration, AGENT_TABLES[room.agent]) for room in ctx["rooms"]]; factor = Room.get_agent_factor
+    return len(pairs), lambda: [factor(dc, table) for dc, table in pairs]
+def _bench_agent_factor_compiled(ctx):
+    pairs = [(room.design_concentration, AGENT_REGISTRY[room.agent]) for room in ctx["rooms"]]
+    return len(pairs), lambda: [table.factor(dc) for dc, table in pairs]
+def _bench_batch(ctx):
+    import_optional("numpy"); table = ctx["table"]; return len(table), lambda: calculate_required_agent_batch(table)
+def _bench_report(ctx):
+    table = ctx["table"]; return len(table), lambda: build_calculation_report(table, "Benchmark", "Benchmark").to_text()
+def _bench_oem_bom(ctx):
+    funcs = {oem: entry["func"] for oem, entry in OEM_BOM_DATABASES.items()}
+    work = [(funcs[room.oem], kg, room.actuation_type) for room, kg in zip(ctx["rooms"], ctx["required"])]
+    return len(work), lambda: [func(kg, actuation) for func, kg, actuation in work]
+def _bench_aggregate(ctx):
+    boms = ctx["bom_lists"]; return len(boms), lambda: aggregate_bom(boms)
+def _bench_project_bom(ctx):
+    table = ctx["table"]; return len(table), lambda: generate_project_bom(table)
+def _bench_json_save(ctx):
+    path = os.path.join(ctx["dir"], "bench.json"); table = ctx["table"]
+    return len(table), lambda: save_project_file(path, table, project_name="Benchmark")
+def _bench_json_load(ctx):
+    path = os.path.join(ctx["dir"], "bench.json")
+    if not os.path.exists(path): save_project_file(path, ctx["table"])
+    return len(ctx["table"]), lambda: RoomTable(load_project_file(path))
+def _bench_db_save(ctx):
+    path = os.path.join(ctx["dir"], "bench.fmproj"); table = ctx["table"]
+    def run():
+        if os.path.exists(path): os.remove(path)
+        write_project_db(path, table, project_name="Benchmark")
+    return len(table), run
+def _bench_db_load(ctx):
+    path = os.path.join(ctx["dir"], "bench.fmproj")
+    if not os.path.exists(path): write_project_db(path, ctx["table"])
+    def run():
+        with ProjectStore(path) as store: return store.load()
+    return len(ctx["table"]), run
+def _bench_excel_import(ctx):
+    openpyxl = import_optional("openpyxl"); rooms = ctx["io_rooms"]; path = os.path.join(ctx["dir"], "bench_rooms.xlsx")
+    wb = openpyxl.Workbook(write_only=True); ws = wb.create_sheet("Rooms"); ws.append(list(ROOM_FIELDS))
+    for room in rooms: ws.append([getattr(room, f) for f in ROOM_FIELDS])
+    wb.save(path)
+    return len(rooms), lambda: read_rooms_from_excel(path)
+def _bench_export(writer, ext, backend, bom=False):
+    def stage(ctx):
+        if backend: import_optional(backend)
+        table = RoomTable(ctx["io_rooms"]); path = os.path.join(ctx["dir"], f"bench_{writer.__name__}.{ext}")
+        if bom:
+            bom_per_room, project_bom = generate_project_bom(table); return len(table), lambda: writer(path, bom_per_room, project_bom)
+        report = build_calculation_report(table, "Benchmark", "Benchmark"); return len(table), lambda: writer(path, report)
+    return stage
+BENCH_STAGES = {
+    "generate": _bench_generate, "calculate": _bench_calculate, "agent_factor": _bench_agent_factor,
+    "agent_factor_compiled": _bench_agent_factor_compiled, "calculate_batch": _bench_batch, "report": _bench_report, "oem_bom": _bench_oem_bom,
+    "aggregate_bom": _bench_aggregate, "project_bom": _bench_project_bom,
+    "json_save": _bench_json_save, "json_load": _bench_json_load, "db_save": _bench_db_save, "db_load": _bench_db_load,
+    "excel_import": _bench_excel_import,
+    "pdf_export": _bench_export(write_report_pdf, "pdf", "reportlab"),
+    "word_export": _bench_export(write_report_word, "docx", "docx"),
+    "excel_report_export": _bench_export(write_report_excel, "xlsx", "openpyxl"),
+    "bom_excel_export": _bench_export(write_bom_excel, "xlsx", "openpyxl", bom=True),
+    "bom_csv_export": _bench_export(write_bom_delimited, "csv", None, bom=True),
+}
+def run_benchmarks(sizes, stages=None, seed=0, repeat=3, max_io_rooms=20000, memory=True, log=None):
+    """Run the selected stages for each project size. Returns a baseline document (see BENCH_FORMAT)."""
+    import gc, tempfile, time, tracemalloc, platform
+    stages = list(stages or BENCH_STAGES); results = {}
+    for n in sizes:
+        rooms = generate_synthetic_project(n, seed); table = RoomTable(rooms)
+        required = [room.calculate_required_agent()[0] for room in rooms]
+        bom_lists = [room_bom_entry(room, kg)["bom"] for room, kg in zip(rooms, required) if room.agent == "FM-200 (HFC-227ea)"]
+        with tempfile.TemporaryDirectory(prefix="fm200-bench-") as tmp:
+            ctx = {"n": n, "seed": seed, "rooms": rooms, "table": table, "required": required, "bom_lists": bom_lists,
+                   "io_rooms": rooms[:max_io_rooms], "dir": tmp}
+            for name in stages:
+                key = f"{name}@{n}"
+                try: count, thunk = BENCH_STAGES[name](ctx)
+                except MissingDependency as e:
+                    results[key] = {"stage": name, "skipped": str(e)}
+                    if log: log(f"{key:<28} skipped: {e}")
+                    continue
+                best = None
+                for _ in range(max(1, repeat)):
+                    gc.collect(); start = time.perf_counter(); thunk(); elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                peak = None
+                if memory:
+                    gc.collect(); tracemalloc.start()
+                    try: thunk(); peak = tracemalloc.get_traced_memory()[1]
+                    finally: tracemalloc.stop()
+                results[key] = {"stage": name, "rooms": count, "seconds": best, "rooms_per_s": count / best if best else None, "peak_bytes": peak}
+                if log: log(format_bench_line(key, results[key]))
+    return {"format": BENCH_FORMAT, "version": 1, "seed": seed, "python": sys.version.split()[0],
+            "platform": platform.platform(), "created": datetime.datetime.now().isoformat(timespec="seconds"), "stages": results}
+def format_bench_line(key, result, delta=""):
+    if "skipped" in result: return f"{key:<28} skipped"
+    peak = "-" if result["peak_bytes"] is None else f"{result['peak_bytes'] / 1e6:9.1f} MB"
+    rate = f"{result['rooms_per_s']:>12,.0f}/s" if result["rooms_per_s"] else f"{'-':>14}"
+    return f"{key:<28} {result['rooms']:>8} rooms {result['seconds']:>9.4f} s {rate} {peak:>12}{delta}"
+def compare_benchmarks(current, baseline, threshold=0.2, memory_threshold=None):
+    """Stages slower (by throughput) or hungrier (by peak memory) than the baseline past the threshold."""
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for key, result in current["stages"].items():
+        base = baseline.get("stages", {}).get(key)
+        if not base or "skipped" in base or "skipped" in result or base.get("rooms") != result["rooms"]: continue
+        if base.get("rooms_per_s") and result["rooms_per_s"] and result["rooms_per_s"] < base["rooms_per_s"] / (1 + threshold):
+            regressions.append((key, "throughput", base["rooms_per_s"], result["rooms_per_s"]))
+        if base.get("peak_bytes") and result["peak_bytes"] and result["peak_bytes"] > base["peak_bytes"] * (1 + memory_threshold):
+            regressions.append((key, "peak memory", base["peak_bytes"], result["peak_bytes"]))
+    return regressions
+def run_bench(args):
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f: baseline = json.load(f)
+        if baseline.get("format") != BENCH_FORMAT: print(f"Error: {args.baseline} is not a benchmark baseline.", file=sys.stderr); return 2
+    unknown = [s for s in args.stages or () if s not in BENCH_STAGES]
+    if unknown: print(f"Error: unknown stage(s) {', '.join(unknown)}; choose from {', '.join(BENCH_STAGES)}.", file=sys.stderr); return 2
+    print(f"{'stage@rooms':<28} {'rooms':>8} {'':5} {'time':>11} {'throughput':>16} {'peak':>12}")
+    current = run_benchmarks(args.rooms, args.stages, args.seed, args.repeat, args.max_io_rooms, not args.no_memory, log=print)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(current, f, indent=2)
+    if baseline is None: return 0
+    regressions = compare_benchmarks(current, baseline, args.threshold, args.memory_threshold)
+    for key, metric, before, after in regressions:
+        print(f"REGRESSION {key}: {metric} {before:,.0f} -> {after:,.0f} ({(after - before) / before:+.1%})")
+    if not regressions: print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 1 if regressions else 0
+
+# --------- CALCULATION SERVICE ----------
+# Local HTTP/JSON front end to the engine for estimating/ERP tools. One asyncio loop serves keep-alive
+# connections; rooms from concurrent requests are coalesced into one batch calculation per window, run on a
+# worker thread. Agent tables and OEM catalogs are compiled at startup and stay resident. Large BOMs are
+# streamed as NDJSON (one room per line, then the project total) instead of one JSON document.
+SERVICE_FORMAT = "clean-agent-service"
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_BATCH_WINDOW = 0.002
+SERVICE_BATCH_ROOMS = 50000
+SERVICE_STREAM_ROOMS = 2000
+SERVICE_STREAM_CHUNK = 500
+SERVICE_MAX_BODY = 256 * 1024 * 1024
+SERVICE_INLINE_ROOMS = 500
+SERVICE_RESULT_FIELDS = (("required_kg", "required"), ("factor", "factor"), ("alt_corr", "alt_corr"),
+                         ("temp_corr", "temp_corr"), ("volume_m3", "volume"))
+# Physical limits on request rooms. The altitude correction has no real value above ~44 km, so out-of-range input
+# is a 400 rather than a complex number in the engine.
+SERVICE_POSITIVE_FIELDS = ("length", "width", "height", "design_concentration")
+SERVICE_FIELD_RANGES = {"design_concentration": (0.0, 100.0), "altitude": (-500.0, 11000.0), "temperature": (-60.0, 150.0)}
+class ServiceError(Exception):
+    def __init__(self, status, message): super().__init__(message); self.status = status
+def room_from_request(data, index=0):
+    """Validate one room object from a request body; optional fields take the GUI defaults."""
+    import math
+    if not isinstance(data, dict): raise ServiceError(400, f"rooms[{index}]: expected an object")
+    values = {}
+    for field in EXCEL_NUMERIC_FIELDS:
+        if field not in data: raise ServiceError(400, f"rooms[{index}].{field}: required")
+        try: values[field] = float(data[field])
+        except (TypeError, ValueError): values[field] = math.nan
+        if not math.isfinite(values[field]): raise ServiceError(400, f"rooms[{index}].{field}: invalid number {data[field]!r}")
+        if field in SERVICE_POSITIVE_FIELDS and values[field] <= 0: raise ServiceError(400, f"rooms[{index}].{field}: must be greater than 0")
+        low, high = SERVICE_FIELD_RANGES.get(field, (-math.inf, math.inf))
+        if not low <= values[field] <= high: raise ServiceError(400, f"rooms[{index}].{field}: must be between {low:g} and {high:g}")
+    units = data.get("units", "metric"); agent = data.get("agent", "FM-200 (HFC-227ea)")
+    if units not in ("metric", "imperial"): raise ServiceError(400, f"rooms[{index}].units: expected 'metric' or 'imperial', got {units!r}")
+    if agent not in AGENT_REGISTRY: raise ServiceError(400, f"rooms[{index}].agent: unknown agent {agent!r}")
+    oem = str(data.get("oem", DEFAULT_OEM))
+    if "oem" in data and oem != "" and oem not in oem_options(agent):
+        raise ServiceError(400, f"rooms[{index}].oem: no {agent} hardware from {oem!r}")
+    return Room(str(data.get("name", "")), units=units, agent=agent, actuation_type=str(data.get("actuation_type", "Electrical")),
+                oem=oem, **values)
+def rooms_from_request(body):
+    """Rooms from a JSON body: {"rooms": [...]}, a bare list of rooms, or a single room object."""
+    try: data = json.loads(body or b"null")
+    except (ValueError, UnicodeDecodeError) as e: raise ServiceError(400, f"invalid JSON: {e}")
+    if isinstance(data, dict): data = data["rooms"] if "rooms" in data else [data]
+    if not isinstance(data, list): raise ServiceError(400, "expected {\"rooms\": [...]}")
+    return [room_from_request(room, i) for i, room in enumerate(data)]
+def service_calculate(rooms):
+    """Result columns (as lists) for a batch of rooms: the NumPy engine when available, else the scalar path."""
+    with INSTRUMENTS.stage("service_batch", len(rooms)):
+        if DEPENDENCIES.available("numpy"):
+            return {k: v.tolist() for k, v in calculate_required_agent_batch(rooms).items()}
+        results = [room.calculate_required_agent() for room in rooms]
+        return dict(zip(("required", "factor", "alt_corr", "temp_corr", "volume"), map(list, zip(*results) if results else ([],) * 5)))
+def service_results(rooms, columns):
+    """The /calculate payload: per-room results and the agent totals."""
+    results = [dict(name=room.name, agent=room.agent, **{key: columns[column][i] for key, column in SERVICE_RESULT_FIELDS})
+               for i, room in enumerate(rooms)]
+    agent_kg = {}
+    for room, kg in zip(rooms, columns["required"]): agent_kg[room.agent] = agent_kg.get(room.agent, 0.0) + kg
+    return {"results": results, "agent_kg": agent_kg, "total_kg": sum(agent_kg.values())}
+def service_bom(rooms, required):
+    """(per-room BOM entries, project BOM) for rooms and their required agent."""
+    with INSTRUMENTS.stage("service_bom", len(rooms)):
+        entries = [dict(room_bom_entry(room, kg), agent_kg=kg) for room, kg in zip(rooms, required)]
+        return entries, aggregate_bom(entry["bom"] for entry in entries if entry["oem"])
+
+class CalculationBatcher:
+    """Coalesces the rooms of concurrent requests into one service_calculate call per window (or per max_rooms)."""
+    def __init__(self, window=SERVICE_BATCH_WINDOW, max_rooms=SERVICE_BATCH_ROOMS):
+        self.window = window; self.max_rooms = max_rooms
+        self._pending = []; self._pending_rooms = 0; self._timer = None; self._tasks = set()
+        self.batches = self.requests = self.rooms = 0
+    async def calculate(self, rooms):
+        import asyncio
+        loop = asyncio.get_running_loop(); future = loop.create_future()
+        self._pending.append((rooms, future)); self._pending_rooms += len(rooms)
+        if self._pending_rooms >= self.max_rooms: self._flush()
+        elif self._timer is None: self._timer = loop.call_later(self.window, self._flush)
+        return await future
+    def _flush(self):
+        import asyncio
+        if self._timer is not None: self._timer.cancel(); self._timer = None
+        pending, self._pending, self._pending_rooms = self._pending, [], 0
+        if not pending: return
+        self.batches += 1; self.requests += len(pending); self.rooms += sum(len(batch) for batch, _ in pending)
+        task = asyncio.ensure_future(self._run(pending)); self._tasks.add(task); task.add_done_callback(self._tasks.discard)
+    async def _run(self, pending):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try: columns = await loop.run_in_executor(None, service_calculate, [room for batch, _ in pending for room in batch])
+        except Exception as e:
+            if len(pending) == 1:
+                if not pending[0][1].done(): pending[0][1].set_exception(e)
+                return
+            # One bad request must not fail the others it was batched with: rerun each on its own.
+            for item in pending: await self._run([item])
+            return
+        start = 0
+        for batch, future in pending:
+            end = start + len(batch)
+            if not future.done(): future.set_result({k: v[start:end] for k, v in columns.items()})
+            start = end
+    def stats(self): return {"batches": self.batches, "requests": self.requests, "rooms": self.rooms}
+
+class CalculationService:
+    """GET /health, POST /calculate and POST /bom over HTTP/1.1 keep-alive.
+
+    Both POSTs take {"rooms": [room, ...]} with the project-file room fields (units, agent, actuation_type and oem
+    optional). /calculate answers with per-room results and agent totals; /bom with per-room BOM entries and the
+    project BOM, or, past stream_rooms rooms or with Accept: application/x-ndjson, one entry per NDJSON line followed
+    by a {"project_bom": ...} line. Errors are {"error": message} with a 4xx/5xx status.
+    """
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, batch_window=SERVICE_BATCH_WINDOW, stream_rooms=SERVICE_STREAM_ROOMS):
+        self.host = host; self.port = port; self.stream_rooms = stream_rooms
+        self.batcher = CalculationBatcher(batch_window); self._server = None
+    def warm(self):
+        # Compile every agent table and fill each OEM system's BOM cache before the first request arrives.
+        AGENT_REGISTRY.ensure_current(); DEPENDENCIES.warm(("numpy",))
+        rooms = generate_synthetic_project(200)
+        for room, kg in zip(rooms, service_calculate(rooms)["required"]): room_bom_entry(room, kg)
+    async def start(self):
+        import asyncio
+        await asyncio.get_running_loop().run_in_executor(None, self.warm)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+    async def serve_forever(self):
+        if self._server is None: await self.start()
+        async with self._server: await self._server.serve_forever()
+    def close(self):
+        if self._server is not None: self._server.close()
+    async def _handle(self, reader, writer):
+        import asyncio
+        try:
+            while True:
+                try: request = await self._read_request(reader)
+                except ServiceError as e: await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False); break
+                if request is None: break
+                method, path, headers, body, keep_alive = request
+                try: await self._dispatch(writer, method, path, headers, body, keep_alive)
+                except ServiceError as e: await self._send_json(writer, e.status, {"error": str(e)}, keep_alive)
+                except Exception as e: await self._send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"}, keep_alive)
+                if not keep_alive: break
+        except (ConnectionError, asyncio.IncompleteReadError): pass
+        finally:
+            writer.close()
+            try: await writer.wait_closed()
+            except ConnectionError: pass
+    async def _read_request(self, reader):
+        import asyncio
+        try: head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip(): raise ServiceError(400, "incomplete request")
+            return None
+        except asyncio.LimitOverrunError: raise ServiceError(431, "request headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try: method, target, version = lines[0].split(" ", 2)
+        except ValueError: raise ServiceError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name: headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower(): raise ServiceError(411, "send a Content-Length body")
+        try: length = int(headers.get("content-length") or 0)
+        except ValueError: raise ServiceError(400, "invalid Content-Length")
+        if length > SERVICE_MAX_BODY: raise ServiceError(413, f"request body over {SERVICE_MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        return method.upper(), target.split("?", 1)[0], headers, body, keep_alive
+    async def _dispatch(self, writer, method, path, headers, body, keep_alive):
+        routes = {("GET", "/health"): self._health, ("POST", "/calculate"): self._calculate, ("POST", "/bom"): self._bom}
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in routes): raise ServiceError(405, f"{method} not allowed on {path}")
+            raise ServiceError(404, f"no such endpoint {path}")
+        await handler(writer, headers, body, keep_alive)
+    async def _parse_rooms(self, body):
+        import asyncio
+        # Big bodies are decoded on a worker thread so other connections keep being served meanwhile.
+        if len(body) < 256 * 1024: return rooms_from_request(body)
+        return await asyncio.get_running_loop().run_in_executor(None, rooms_from_request, body)
+    async def _per_room(self, rooms, func, *args):
+        import asyncio
+        # Same for work that grows with the room count: only small requests run on the loop thread.
+        if len(rooms) <= SERVICE_INLINE_ROOMS: return func(rooms, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, rooms, *args)
+    async def _health(self, writer, headers, body, keep_alive):
+        await self._send_json(writer, 200, {"format": SERVICE_FORMAT, "status": "ok", "agents": AGENT_REGISTRY.agents(),
+                                            "oems": list(OEM_BOM_DATABASES), "agent_tables_version": AGENT_REGISTRY.version,
+                                            "numpy": DEPENDENCIES.available("numpy"), "batching": self.batcher.stats()}, keep_alive)
+    async def _calculate(self, writer, headers, body, keep_alive):
+        rooms = await self._parse_rooms(body)
+        columns = await self.batcher.calculate(rooms) if rooms else {k: [] for _, k in SERVICE_RESULT_FIELDS}
+        await self._send_json(writer, 200, await self._per_room(rooms, service_results, columns), keep_alive)
+    async def _bom(self, writer, headers, body, keep_alive):
+        import asyncio
+        rooms = await self._parse_rooms(body)
+        required = (await self.batcher.calculate(rooms))["required"] if rooms else []
+        entries, project_bom = await self._per_room(rooms, service_bom, required)
+        stream = "application/x-ndjson" in headers.get("accept", "") or len(entries) > self.stream_rooms
+        if not stream:
+            await self._send_json(writer, 200, {"rooms": entries, "project_bom": project_bom}, keep_alive); return
+        writer.write(self._head(200, "application/x-ndjson", keep_alive, chunked=True))
+        for start in range(0, len(entries), SERVICE_STREAM_CHUNK):
+            lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries[start:start + SERVICE_STREAM_CHUNK])
+            writer.write(self._chunk(lines.encode())); await writer.drain(); await asyncio.sleep(0)
+        total = json.dumps({"project_bom": project_bom, "rooms": len(entries)}, separators=(",", ":")) + "\n"
+        writer.write(self._chunk(total.encode()) + b"0\r\n\r\n"); await writer.drain()
+    @staticmethod
+    def _head(status, content_type, keep_alive, length=None, chunked=False):
+        from http import HTTPStatus
+        framing = "Transfer-Encoding: chunked" if chunked else f"Content-Length: {length}"
+        return (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n{framing}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+    @staticmethod
+    def _chunk(data): return f"{len(data):X}\r\n".encode() + data + b"\r\n"
+    async def _send_json(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        writer.write(self._head(status, "application/json", keep_alive, len(data)) + data); await writer.drain()
+
+# Load-test client: keep-alive connections replaying pre-encoded synthetic requests, timed per request.
+async def _read_http_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n"); lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1]); headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name: headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            parts.append(await reader.readexactly(size + 2))
+            if size == 0: break
+        body = b"".join(part[:-2] for part in parts)
+    else: body = await reader.readexactly(int(headers.get("content-length") or 0))
+    return status, headers, body
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+async def load_test(host=SERVICE_HOST, port=SERVICE_PORT, endpoint="/calculate", concurrency=32, requests=2000,
+                    rooms_per_request=5, seed=0, ndjson=False):
+    """Send `requests` POSTs from `concurrency` connections. Returns latency percentiles (ms) and throughput."""
+    import asyncio, time
+    rooms = [room.to_dict() for room in generate_synthetic_project(rooms_per_request * 64, seed)]
+    accept = "application/x-ndjson" if ndjson else "application/json"
+    payloads = []
+    for start in range(0, len(rooms), rooms_per_request):
+        body = json.dumps({"rooms": rooms[start:start + rooms_per_request]}).encode()
+        payloads.append(f"POST {endpoint} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\nAccept: {accept}\r\n"
+                        f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    latencies = []; errors = {}; issued = iter(range(requests)); clock = time.perf_counter
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in issued:
+                start = clock(); writer.write(payloads[i % len(payloads)])
+                status, _, _ = await _read_http_response(reader); latencies.append(clock() - start)
+                if status != 200: errors[status] = errors.get(status, 0) + 1
+        finally: writer.close()
+    start = clock()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = clock() - start; ordered = sorted(latencies)
+    return {"endpoint": endpoint, "requests": len(latencies), "errors": errors, "concurrency": concurrency,
+            "rooms_per_request": rooms_per_request, "seconds": seconds, "requests_per_s": len(latencies) / seconds,
+            "rooms_per_s": len(latencies) * rooms_per_request / seconds,
+            "p50_ms": _percentile(ordered, 0.50) * 1e3, "p99_ms": _percentile(ordered, 0.99) * 1e3,
+            "max_ms": (ordered[-1] if ordered else float("nan")) * 1e3}
+async def service_health(host=SERVICE_HOST, port=SERVICE_PORT):
+    import asyncio
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET /health HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+        return json.loads((await _read_http_response(reader))[2])
+    finally: writer.close()
+def format_load_test(result, batching=None):
+    errors = ", ".join(f"{n}× HTTP {status}" for status, n in sorted(result["errors"].items())) or "none"
+    text = (f"{result['endpoint']}: {result['requests']} requests × {result['rooms_per_request']} rooms, "
+            f"{result['concurrency']} connections, {result['seconds']:.2f} s\n"
+            f"  {result['requests_per_s']:,.0f} req/s  {result['rooms_per_s']:,.0f} rooms/s\n"
+            f"  latency p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms\n"
+            f"  errors: {errors}\n")
+    if batching and batching["batches"]:
+        text += f"  server batching: {batching['requests'] / batching['batches']:.1f} requests/batch over {batching['batches']} batches\n"
+    return text
+
+# --------- HEADLESS CLI ----------
+def load_project(file_path):
+    if file_path.lower().endswith((".xlsx", ".xlsm")):
+        calculator = AgentCalculator(); _, errors = import_rooms_from_excel(file_path, calculator)
+        if errors: sys.stderr.write(f"{len(errors)} row(s) were not imported:\n{format_import_errors(errors)}\n")
+        return calculator.rooms, {field: "" for field in PROJECT_METADATA_FIELDS}
+    return read_project_file(file_path)
+def load_rooms(file_path): return load_project(file_path)[0]
+def run_headless(args):
+    with INSTRUMENTS.stage("load") as record:
+        rooms, metadata = load_project(args.input); record["rooms"] = n = len(rooms)
+    with INSTRUMENTS.stage("calculate", n):
+        report = build_calculation_report(rooms, args.project_name or metadata["project_name"], args.customer_name or metadata["customer_name"])
+    wants_bom = args.bom or args.bom_excel or args.bom_csv
+    with INSTRUMENTS.stage("bom", n):
+        bom_per_room, project_bom = generate_project_bom(rooms) if wants_bom else ([], [])
+    exports = [(args.report, "export_text", lambda path: write_report_text(path, report)),
+               (args.bom, "export_bom_text", lambda path: write_bom_text(path, bom_per_room, project_bom)),
+               (args.pdf, "export_pdf", lambda path: write_report_pdf(path, report)),
+               (args.word, "export_word", lambda path: write_report_word(path, report)),
+               (args.report_excel, "export_report_excel", lambda path: write_report_excel(path, report)),
+               (args.bom_excel, "export_bom_excel", lambda path: write_bom_excel(path, bom_per_room, project_bom)),
+               (args.bom_csv, "export_bom_csv", lambda path: write_bom_delimited(path, bom_per_room, project_bom))]
+    for path, stage, write in exports:
+        if path:
+            with INSTRUMENTS.stage(stage, n): write(path)
+    if args.timings:
+        for r in INSTRUMENTS.last(INSTRUMENTS.HISTORY):
+            sys.stderr.write(f"{r['stage']:<20} {r['seconds']:9.4f} s  {r['rooms'] or 0:>8} rooms" + _memory_text(r, " peak {:.1f} MB", " RSS {:+.1f} MB") + "\n")
+    if not any((args.report, args.bom, args.pdf, args.word, args.report_excel, args.bom_excel, args.bom_csv)): sys.stdout.write(report.to_text() + "\n")
+    return 0
+def run_sweep(args):
+    try: grids = [parse_grid(values) for values in (args.concentration, args.altitude, args.temperature)]
+    except ValueError as e: print(f"Error: {e}", file=sys.stderr); return 2
+    with INSTRUMENTS.stage("load") as record:
+        rooms, _ = load_project(args.input); record["rooms"] = len(rooms)
+    with INSTRUMENTS.stage("sweep", len(rooms)): result = sensitivity_sweep(rooms, *grids, quantiles=args.quantiles)
+    if args.csv: result.write_csv(args.csv)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(result.to_text())
+    elif not args.csv: sys.stdout.write(result.to_text())
+    return 0
+def run_serve(args):
+    import asyncio
+    service = CalculationService(args.host, args.port, args.batch_window_ms / 1000, args.stream_rooms)
+    async def serve():
+        await service.start()
+        sys.stderr.write(f"Serving on http://{service.host}:{service.port} (GET /health, POST /calculate, POST /bom); Ctrl+C to stop.\n")
+        await service.serve_forever()
+    try: asyncio.run(serve())
+    except KeyboardInterrupt: pass
+    except OSError as e: print(f"Error: {e}", file=sys.stderr); return 2
+    return 0
+def run_loadtest(args):
+    import asyncio
+    async def measure():
+        service = await CalculationService(args.host, 0).start() if args.local else None
+        port = service.port if service else args.port
+        try:
+            before = (await service_health(args.host, port))["batching"]
+            result = await load_test(args.host, port, "/" + args.endpoint, args.concurrency, args.requests, args.rooms, args.seed, args.ndjson)
+            after = (await service_health(args.host, port))["batching"]
+            return result, {k: after[k] - before[k] for k in after}
+        finally:
+            if service: service.close()
+    try: result, batching = asyncio.run(measure())
+    except OSError as e: print(f"Error: cannot reach the service at {args.host}:{args.port} ({e}).", file=sys.stderr); return 2
+    sys.stdout.write(format_load_test(result, batching))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(dict(result, batching=batching), f, indent=2)
+    return 1 if result["errors"] else 0
+def run_convert(args):
+    rooms, metadata = load_project(args.input)
+    if args.output.lower().endswith(PROJECT_DB_EXTENSIONS): write_project_db(args.output, rooms, **metadata)
+    else: save_project_file(args.output, rooms, **metadata)
+    return 0
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Clean Agent Calculator. Run without arguments to start the GUI.")
+    parser.add_argument("--agents", metavar="JSON", help="Load additional/overriding agent tables from a data file.")
+    parser.add_argument("--oem-catalog", metavar="JSON", help="Load additional/overriding OEM hardware from a catalog file.")
+    parser.add_argument("--trace", metavar="JSON", help="Record a Chrome-trace timeline of every stage (GUI or CLI), written on exit.")
+    parser.add_argument("--profile", nargs="+", metavar="STAGE", help="Run these stages (e.g. calculate bom export_pdf, or 'all') under cProfile.")
+    parser.add_argument("--profile-dir", metavar="DIR", default=".", help="Where --profile writes <stage>-<n>.prof files.")
+    sub = parser.add_subparsers(dest="command")
+    calc = sub.add_parser("calc", help="Calculate a project (database, JSON or Excel) without the GUI.")
+    calc.add_argument("input", help="Project .fmproj/.json (as saved by the GUI) or rooms .xlsx (as imported by the GUI).")
+    calc.add_argument("--project-name", default=""); calc.add_argument("--customer-name", default="")
+    calc.add_argument("--report", metavar="TXT", help="Write the calculation report as text. Printed to stdout when no output is given.")
+    calc.add_argument("--bom", metavar="TXT", help="Write the room-by-room and project BOM as text.")
+    calc.add_argument("--pdf", metavar="PDF", help="Export the calculation report to PDF.")
+    calc.add_argument("--word", metavar="DOCX", help="Export the calculation report to Word.")
+    calc.add_argument("--report-excel", metavar="XLSX", help="Export the calculation report to Excel.")
+    calc.add_argument("--bom-excel", metavar="XLSX", help="Export the BOM to Excel (room-by-room and project-total sheets).")
+    calc.add_argument("--bom-csv", metavar="CSV", help="Export the BOM as CSV (.tsv for tab-separated); totals go to <name>_project_total.")
+    calc.add_argument("--timings", action="store_true", help="Print per-stage timings to stderr.")
+    calc.set_defaults(func=run_headless)
+    convert = sub.add_parser("convert", help="Convert a project between .fmproj database, .json and (input only) .xlsx.")
+    convert.add_argument("input"); convert.add_argument("output", help="Output .fmproj (database) or .json; replaced if it exists.")
+    convert.set_defaults(func=run_convert)
+    sweep = sub.add_parser("sweep", help="Sweep design concentration, altitude and temperature grids over every room.")
+    sweep.add_argument("input", help="Project .fmproj/.json or rooms .xlsx.")
+    grid_help = "Values and/or start:stop:count ranges; omit to keep each room's own value."
+    sweep.add_argument("--concentration", nargs="+", metavar="V", help=f"Design concentrations (%%), applied to every agent. {grid_help}")
+    sweep.add_argument("--altitude", nargs="+", metavar="V", help=f"Altitudes (m). {grid_help}")
+    sweep.add_argument("--temperature", nargs="+", metavar="V", help=f"Temperatures (°C). {grid_help}")
+    sweep.add_argument("--quantiles", nargs="+", type=float, default=list(SWEEP_QUANTILES), metavar="Q")
+    sweep.add_argument("--output", metavar="TXT", help="Write the summary here instead of stdout.")
+    sweep.add_argument("--csv", metavar="CSV", help="Write per-room min/quantiles/max and cylinders as CSV.")
+    sweep.set_defaults(func=run_sweep)
+    portfolio = sub.add_parser("portfolio", help="Calculate a directory of projects in parallel and merge a portfolio takeoff.")
+    portfolio.add_argument("directory"); portfolio.add_argument("--pattern", nargs="+", default=["*.json"], help="Project file globs (default *.json).")
+    portfolio.add_argument("--output", metavar="DIR", help="Output directory (default: DIRECTORY/portfolio).")
+    portfolio.add_argument("--workers", type=int, help="Worker processes (default: all cores).")
+    portfolio.add_argument("--no-project-files", action="store_true", help="Skip the per-project report/BOM text files.")
+    portfolio.set_defaults(func=run_portfolio)
+    bench = sub.add_parser("bench", help="Benchmark the engine, file I/O and exports on synthetic projects.")
+    bench.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000], help="Project sizes to run (e.g. 10 1000 100000 1000000).")
+    bench.add_argument("--stages", nargs="+", metavar="STAGE", help=f"Subset of: {', '.join(BENCH_STAGES)}.")
+    bench.add_argument("--seed", type=int, default=0); bench.add_argument("--repeat", type=int, default=3, help="Best-of-N timing.")
+    bench.add_argument("--max-io-rooms", type=int, default=20000, help="Cap on rooms for Excel import and document exports.")
+    bench.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass that records peak memory.")
+    bench.add_argument("--output", metavar="JSON", help="Write results as a baseline file.")
+    bench.add_argument("--baseline", metavar="JSON", help="Compare with a saved baseline; exit 1 on regressions.")
+    bench.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown as a fraction of baseline time (default 0.2 = 20%% slower).")
+    bench.add_argument("--memory-threshold", type=float, help="Allowed peak memory growth as a fraction (default: --threshold).")
+    bench.set_defaults(func=run_bench)
+    serve = sub.add_parser("serve", help="Serve calculations and BOMs over local HTTP/JSON for estimating/ERP tools.")
+    serve.add_argument("--host", default=SERVICE_HOST); serve.add_argument("--port", type=int, default=SERVICE_PORT)
+    serve.add_argument("--batch-window-ms", type=float, default=SERVICE_BATCH_WINDOW * 1000, help="How long to gather concurrent requests into one batch.")
+    serve.add_argument("--stream-rooms", type=int, default=SERVICE_STREAM_ROOMS, help="Stream /bom as NDJSON above this many rooms.")
+    serve.set_defaults(func=run_serve)
+    loadtest = sub.add_parser("loadtest", help="Load-test a running service and report p50/p99 latency and requests/s.")
+    loadtest.add_argument("--host", default=SERVICE_HOST); loadtest.add_argument("--port", type=int, default=SERVICE_PORT)
+    loadtest.add_argument("--endpoint", choices=("calculate", "bom"), default="calculate")
+    loadtest.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections.")
+    loadtest.add_argument("--requests", type=int, default=5000); loadtest.add_argument("--rooms", type=int, default=5, help="Rooms per request.")
+    loadtest.add_argument("--seed", type=int, default=0); loadtest.add_argument("--ndjson", action="store_true", help="Ask /bom for NDJSON.")
+    loadtest.add_argument("--local", action="store_true", help="Start a service in this process (shares the CPU with the client).")
+    loadtest.add_argument("--output", metavar="JSON", help="Also write the results as JSON.")
+    loadtest.set_defaults(func=run_loadtest)
+    sub.add_parser("gui", help="Start the GUI (default).")
+    return parser
+def run_gui():
+    _import_tk(); root = tk.Tk(); app = ModernFM200App(root); root.mainloop()
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv: run_gui(); return 0
+    args = build_arg_parser().parse_args(argv)
+    if args.agents:
+        try: load_agent_file(args.agents)
+        except (OSError, ValueError) as e:
+            print(f"Error loading agents: {e}", file=sys.stderr); return 2
+    if args.oem_catalog:
+        try: load_oem_catalog_file(args.oem_catalog)
+        except (OSError, ValueError) as e:
+            print(f"Error loading OEM catalog: {e}", file=sys.stderr); return 2
+    if args.trace or args.profile: INSTRUMENTS.configure(args.trace, args.profile, args.profile_dir)
+    try:
+        if getattr(args, "func", None) is None: run_gui(); return 0
+        return args.func(args)
+    # Bad input (missing or unreadable files, malformed JSON, rooms missing fields, unwritable outputs) is reported, not a traceback.
+    except (MissingDependency, OSError, ValueError, TypeError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr); return 2
+    finally: INSTRUMENTS.finish()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import copy
+import random
+
+import pytest
+
+from clean_agent_calculator import AGENT_OPTIONS, AGENT_TABLES, Room, RoomTable, calculate_required_agent_batch, generate_synthetic_project
+
+
+def linear_scan_factor(design_concentration, agent_table):
+    """The original interpolation, kept as the reference for the compiled lookups."""
+    keys = sorted(agent_table.keys())
+    if design_concentration <= keys[0]: return agent_table[keys[0]]
+    if design_concentration >= keys[-1]: return agent_table[keys[-1]]
+    for i in range(len(keys) - 1):
+        if keys[i] <= design_concentration <= keys[i + 1]:
+            x0, x1 = keys[i], keys[i + 1]
+            return agent_table[x0] + (design_concentration - x0) * (agent_table[x1] - agent_table[x0]) / (x1 - x0)
+    raise KeyError("Design concentration out of range for interpolation.")
+
+
+@pytest.mark.parametrize("agent", [a for a, table in AGENT_TABLES.items() if len(table) > 1])
+def test_get_agent_factor_matches_linear_scan(agent):
+    table = AGENT_TABLES[agent]; rng = random.Random(0)
+    points = [min(table) - 1, max(table) + 1, *table, *(rng.uniform(min(table), max(table)) for _ in range(500))]
+    for dc in points: assert Room.get_agent_factor(dc, table) == linear_scan_factor(dc, table)
+
+
+def test_get_agent_factor_sees_in_place_edits():
+    table = {6.0: 0.5, 8.0: 0.7}
+    assert Room.get_agent_factor(7.0, table) == linear_scan_factor(7.0, table)
+    table[8.0] = 0.9
+    assert Room.get_agent_factor(7.0, table) == linear_scan_factor(7.0, table)
+
+
+@pytest.fixture
+def restore_agent_tables():
+    tables, options = copy.deepcopy(AGENT_TABLES), copy.deepcopy(AGENT_OPTIONS)
+    yield
+    AGENT_TABLES.clear(); AGENT_TABLES.update(tables); AGENT_OPTIONS.clear(); AGENT_OPTIONS.update(options)
+
+
+def test_scalar_and_batch_follow_in_place_edits(restore_agent_tables):
+    pytest.importorskip("numpy")
+    rooms = generate_synthetic_project(200, seed=4); fm200 = Room("R", 5, 4, 3, 7.0, 0, 20)
+    fm200.calculate_required_agent(); calculate_required_agent_batch(rooms)  # compile the registry before editing
+    AGENT_TABLES["FM-200 (HFC-227ea)"][7.0] = 0.9
+    AGENT_OPTIONS["Novec 1230 (FK-5-1-12)"] = {"corrections": False}
+    # Scalar first: the batch path refreshes the registry itself, which would hide a stale scalar lookup.
+    assert fm200.calculate_required_agent()[1] == linear_scan_factor(7.0, AGENT_TABLES["FM-200 (HFC-227ea)"])
+    scalar = [room.calculate_required_agent()[:4] for room in rooms]
+    batch = calculate_required_agent_batch(rooms)
+    assert scalar == list(zip(batch["required"], batch["factor"], batch["alt_corr"], batch["temp_corr"]))
+
+
+def test_batch_over_a_room_table_skips_categories_without_live_rows(restore_agent_tables):
+    pytest.importorskip("numpy")
+    table = RoomTable(generate_synthetic_project(300, seed=5)); AGENT_TABLES["Retired agent"] = {5.0: 0.5}
+    table.add(Room("Old", 5, 4, 3, 5.0, 0, 20, agent="Retired agent"))
+    for name in table.names()[:100]: table.remove(name)
+    table.remove("Old"); del AGENT_TABLES["Retired agent"]
+    batch = calculate_required_agent_batch(table)
+    assert [room.calculate_required_agent()[0] for room in table] == batch["required"].tolist()
@@ -0,0 +1,63 @@
+import csv
+import os
+
+import pytest
+
+from clean_agent_calculator import (BOM_ROOM_HEADER, BOM_TOTAL_HEADER, TaskCancelled, bom_totals_path, generate_project_bom,
+                                    generate_synthetic_project, write_bom_file)
+
+
+def cancel_at_first_progress(done, total=None):
+    raise TaskCancelled()
+
+
+@pytest.fixture
+def bom():
+    return generate_project_bom(generate_synthetic_project(2500, seed=1))
+
+
+@pytest.mark.parametrize("extension", [".csv", ".xlsx"])
+def test_cancelled_export_leaves_existing_files_untouched(tmp_path, bom, extension):
+    if extension == ".xlsx": pytest.importorskip("openpyxl")
+    path = str(tmp_path / f"bom{extension}")
+    for existing in (path, bom_totals_path(path)):
+        with open(existing, "w") as f: f.write("previous export")
+    with pytest.raises(TaskCancelled): write_bom_file(path, *bom, progress=cancel_at_first_progress)
+    for existing in (path, bom_totals_path(path)):
+        with open(existing) as f: assert f.read() == "previous export"
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in (path, bom_totals_path(path)))
+
+
+def expected_room_rows(bom_per_room):
+    return [(entry["room"], entry["agent"], entry["oem"], item["part_number"], item["description"], item["qty"], item["unit"])
+            for entry in bom_per_room for item in entry["bom"]]
+
+
+def expected_total_rows(project_bom):
+    return [(item["part_number"], item["description"], item["qty"], item["unit"]) for item in project_bom]
+
+
+def as_text(rows):
+    return [[str(value) for value in row] for row in rows]
+
+
+@pytest.mark.parametrize("extension, delimiter", [(".csv", ","), (".tsv", "\t")])
+def test_delimited_export_writes_room_rows_and_project_totals(tmp_path, bom, extension, delimiter):
+    path = str(tmp_path / f"bom{extension}"); calls = []
+    write_bom_file(path, *bom, progress=lambda done, total=None: calls.append((done, total)))
+    with open(path, encoding="utf-8", newline="") as f: rooms = list(csv.reader(f, delimiter=delimiter))
+    with open(bom_totals_path(path), encoding="utf-8", newline="") as f: totals = list(csv.reader(f, delimiter=delimiter))
+    assert rooms == as_text([BOM_ROOM_HEADER, *expected_room_rows(bom[0])])
+    assert totals == as_text([BOM_TOTAL_HEADER, *expected_total_rows(bom[1])])
+    assert calls and calls[-1][1] == len(bom[0])
+
+
+def test_excel_export_writes_room_and_total_sheets(tmp_path, bom):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = str(tmp_path / "bom.xlsx"); write_bom_file(path, *bom)
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == ["BOM", "Project Total"]
+    assert all(wb[title].freeze_panes == "A2" for title in wb.sheetnames)
+    blank = lambda rows: [tuple(None if value == "" else value for value in row) for row in rows]
+    assert list(wb["BOM"].iter_rows(values_only=True)) == blank([BOM_ROOM_HEADER, *expected_room_rows(bom[0])])
+    assert list(wb["Project Total"].iter_rows(values_only=True)) == blank([BOM_TOTAL_HEADER, *expected_total_rows(bom[1])])
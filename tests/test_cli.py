@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from clean_agent_calculator import main
+
+
+@pytest.mark.parametrize("content, message", [
+    (None, "No such file or directory"),
+    ('{"rooms": [', "Expecting value"),
+    (json.dumps({"rooms": [{"name": "A", "length": 5}]}), "missing 5 required positional arguments"),
+])
+def test_bad_input_is_reported_without_a_traceback(tmp_path, capsys, content, message):
+    path = tmp_path / "project.json"
+    if content is not None: path.write_text(content)
+    assert main(["calc", str(path)]) == 2
+    err = capsys.readouterr().err
+    assert err.startswith("Error: ") and message in err and "Traceback" not in err
+
+
+def test_unwritable_output_is_reported(tmp_path, capsys):
+    path = tmp_path / "project.json"; path.write_text(json.dumps({"rooms": [{"name": "A", "length": 5, "width": 4, "height": 3,
+                                                                          "design_concentration": 7, "altitude": 0, "temperature": 20}]}))
+    assert main(["calc", str(path), "--report", str(tmp_path / "missing" / "report.txt")]) == 2
+    assert capsys.readouterr().err.startswith("Error: ")
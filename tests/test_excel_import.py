@@ -0,0 +1,51 @@
+import pytest
+
+import clean_agent_calculator
+from clean_agent_calculator import EXCEL_REQUIRED_FIELDS, read_rooms_from_excel
+
+openpyxl = pytest.importorskip("openpyxl")
+
+FM200 = "FM-200 (HFC-227ea)"
+
+
+def write_sheet(path, rows, headers=EXCEL_REQUIRED_FIELDS):
+    wb = openpyxl.Workbook(); ws = wb.active
+    ws.append([header.title() for header in headers])
+    for row in rows: ws.append(row)
+    wb.save(path); return str(path)
+
+
+def room_row(name, length=5, units="metric", agent=FM200):
+    return [name, length, 4, 3, 7, 0, 20, units, agent]
+
+
+@pytest.mark.parametrize("chunk", [2000, 2])
+def test_bad_rows_are_reported_by_sheet_row_and_the_rest_imported(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(clean_agent_calculator, "EXCEL_IMPORT_CHUNK", chunk)
+    path = write_sheet(tmp_path / "rooms.xlsx", [
+        room_row("Server"),                      # row 2
+        room_row("Bad length", length="five"),   # row 3
+        [None] * 9,                              # row 4: blank, skipped
+        room_row("Bad agent", agent="Halon"),    # row 5
+        room_row(None),                          # row 6
+        room_row("Bad units", units="cubits"),   # row 7
+        room_row(" UPS "),                       # row 8
+    ])
+    rooms, errors = read_rooms_from_excel(path)
+    assert [room.name for room in rooms] == ["Server", "UPS"]
+    assert errors == [(3, "length: invalid number 'five'"), (5, "agent: unknown agent 'Halon'"), (6, "name: room name required"),
+                      (7, "units: expected 'metric' or 'imperial', got 'cubits'")]
+
+
+@pytest.mark.parametrize("chunk", [2000, 1])
+def test_duplicate_names_keep_the_first_row_and_clash_with_existing_rooms(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(clean_agent_calculator, "EXCEL_IMPORT_CHUNK", chunk)
+    path = write_sheet(tmp_path / "rooms.xlsx", [room_row("A", length=5), room_row("B"), room_row("A", length=9), room_row("Existing")])
+    rooms, errors = read_rooms_from_excel(path, existing={"Existing"})
+    assert [(room.name, room.length) for room in rooms] == [("A", 5.0), ("B", 5.0)]
+    assert errors == [(4, "name: duplicate room name 'A'"), (5, "name: duplicate room name 'Existing'")]
+
+
+def test_missing_columns_are_rejected(tmp_path):
+    path = write_sheet(tmp_path / "rooms.xlsx", [], headers=EXCEL_REQUIRED_FIELDS[:-2])
+    with pytest.raises(ValueError, match="missing columns: units, agent"): read_rooms_from_excel(path)
@@ -0,0 +1,15 @@
+import pytest
+
+from clean_agent_calculator import Instrumentation
+
+
+def test_default_memory_figure_is_the_stage_own_rss_change():
+    instruments = Instrumentation()
+    if instruments._rss() is None: pytest.skip("no resident memory reading on this platform")
+    with instruments.stage("grow"):
+        block = bytearray(64_000_000); block[::4096] = b"x" * len(block[::4096])
+    with instruments.stage("idle"): pass
+    grow, idle = instruments.last(2)
+    assert grow["rss_delta_bytes"] > 50_000_000 and abs(idle["rss_delta_bytes"]) < 10_000_000
+    assert idle["process_peak_rss_bytes"] >= grow["process_peak_rss_bytes"]
+    assert instruments.summary(1).endswith("MB RSS")
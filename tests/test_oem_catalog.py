@@ -0,0 +1,49 @@
+import pytest
+
+from clean_agent_calculator import (DEFAULT_OEM, OEM_BOM_DATABASES, OEM_CATALOG_FORMAT, ResultCache, Room, RoomTable, format_bom_report,
+                                    generate_project_bom, oem_options, register_oem_catalog, service_bom)
+
+NOVEC = "Novec 1230 (FK-5-1-12)"
+ACME_CATALOG = {"format": OEM_CATALOG_FORMAT, "version": 1, "oems": {"Acme": {
+    "actuators": {"Electrical": ["AC-E", "Acme Electric Actuator"], "Manual": ["AC-M", "Acme Manual Actuator"]},
+    "systems": {NOVEC: {"cylinders": [[50, "AC-50", "Acme Novec 50kg"], [None, "AC-200", "Acme Novec 200kg"]],
+                        "lines": ["cylinder", "actuator", ["AC-N", "Acme Nozzle"]]}}}}}
+
+
+@pytest.fixture
+def acme():
+    saved = dict(OEM_BOM_DATABASES)
+    register_oem_catalog(ACME_CATALOG)
+    yield "Acme"
+    OEM_BOM_DATABASES.clear(); OEM_BOM_DATABASES.update(saved)
+
+
+def test_oem_options_follow_the_catalog(acme):
+    assert oem_options(NOVEC) == {acme: ["Electrical", "Manual"]}
+    assert acme not in oem_options("FM-200 (HFC-227ea)") and "Viking" in oem_options("FM-200 (HFC-227ea)")
+    assert oem_options("High Pressure CO2") == {}
+
+
+def test_catalog_agent_rooms_get_a_bom(acme):
+    rooms = [Room("Server", 10, 8, 3, 5.0, 0, 20, agent=NOVEC, actuation_type="Manual", oem=acme),
+             Room("Office", 10, 8, 3, 7.0, 0, 20)]
+    bom_per_room, project_bom = generate_project_bom(rooms)
+    assert [item["part_number"] for item in bom_per_room[0]["bom"]] == ["AC-200", "AC-M", "AC-N"]
+    assert {"AC-200", "AC-M", "AC-N"} <= {item["part_number"] for item in project_bom}
+    assert "FM-200 Only" not in format_bom_report(bom_per_room, project_bom)
+
+
+@pytest.mark.parametrize("oem", ["", "No such OEM"])
+def test_fallback_hardware_counts_in_the_project_total(oem):
+    rooms = [Room(f"R{i}", 5, 4, 3, 7.0, 0, 20, oem=oem) for i in range(2)]
+    bom_per_room, project_bom = generate_project_bom(rooms)
+    assert [entry["oem"] for entry in bom_per_room] == [DEFAULT_OEM, DEFAULT_OEM]
+    assert {item["part_number"]: item["qty"] for item in project_bom} == {item["part_number"]: 2 * item["qty"] for item in bom_per_room[0]["bom"]}
+    required = [room.calculate_required_agent()[0] for room in rooms]
+    entries, service_project_bom = service_bom(rooms, required)
+    assert [{k: v for k, v in entry.items() if k != "agent_kg"} for entry in entries] == bom_per_room
+    assert service_project_bom == project_bom
+    # The incremental path counts an edited room the same way.
+    table = RoomTable([Room("R0", 5, 4, 3, 7.0, 0, 20, oem="Kidde"), rooms[1]]); cache = ResultCache(); cache.bom(table)
+    table.update(rooms[0])
+    assert cache.bom(table)[1] == project_bom
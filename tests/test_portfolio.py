@@ -0,0 +1,33 @@
+import pytest
+
+from clean_agent_calculator import (aggregate_bom, generate_project_bom, generate_synthetic_project, run_portfolio_projects,
+                                    save_project_file, write_project_db)
+
+
+@pytest.fixture
+def projects(tmp_path):
+    projects = {str(tmp_path / f"p{seed}.json"): generate_synthetic_project(300 * seed, seed=seed) for seed in (1, 2, 3)}
+    projects[str(tmp_path / "p4.fmproj")] = generate_synthetic_project(200, seed=4)
+    for path, rooms in projects.items():
+        if path.endswith(".json"): save_project_file(path, rooms, project_name=path)
+        else: write_project_db(path, rooms, project_name=path)
+    return projects
+
+
+def test_merged_portfolio_bom_equals_one_aggregate_over_every_room(tmp_path, projects):
+    broken = tmp_path / "broken.json"; broken.write_text("{")
+    paths = [*projects, str(broken)]
+    summaries, agent_kg, bom = run_portfolio_projects(paths, workers=2)
+    assert [p["file"] for p in summaries] == paths and "error" in summaries[-1]
+    # Rooms without hardware (blank OEM label) carry a placeholder line that no project total counts.
+    every_room = [entry["bom"] for rooms in projects.values() for entry in generate_project_bom(rooms)[0] if entry["oem"]]
+    assert bom == aggregate_bom(every_room)
+    assert sum(agent_kg.values()) == pytest.approx(sum(room.calculate_required_agent()[0] for rooms in projects.values() for room in rooms))
+
+
+def test_aggregate_bom_merges_partial_totals():
+    rooms = generate_synthetic_project(500, seed=5)
+    lines = [entry["bom"] for entry in generate_project_bom(rooms)[0] if entry["oem"]]
+    assert aggregate_bom(lines) == generate_project_bom(rooms)[1]
+    partials = [aggregate_bom(lines[start:start + 70]) for start in range(0, len(lines), 70)]
+    assert aggregate_bom(partials) == aggregate_bom(lines)
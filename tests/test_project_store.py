@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from clean_agent_calculator import ProjectStore, Room, RoomTable, generate_synthetic_project, read_project_file, write_project_db
+
+
+def names_on_disk(path):
+    with ProjectStore(path) as store: return [room.name for page in store.iter_pages(page_size=3) for room in page]
+
+
+def test_reading_a_missing_project_creates_nothing(tmp_path):
+    path = tmp_path / "typo.fmproj"
+    with pytest.raises(FileNotFoundError): read_project_file(str(path))
+    with pytest.raises(FileNotFoundError): ProjectStore(str(path))
+    assert not path.exists()
+
+
+def test_project_database_round_trip(tmp_path):
+    path = str(tmp_path / "project.fmproj"); rooms = generate_synthetic_project(50, seed=1)
+    write_project_db(path, rooms, project_name="P", customer_name="C")
+    loaded, metadata = read_project_file(path)
+    assert [room.to_dict() for room in loaded] == [room.to_dict() for room in rooms]
+    assert (metadata["project_name"], metadata["customer_name"]) == ("P", "C")
+
+
+def test_incremental_sync_writes_only_changes_and_keeps_table_order(tmp_path):
+    path = str(tmp_path / "project.fmproj"); table = RoomTable(generate_synthetic_project(10, seed=1)); names = table.names()
+    with ProjectStore.create(path, table, project_name="P") as store:
+        revision = store.revision
+        assert store.sync(table) == 0 and store.revision == revision
+        edited = table[names[4]]; edited.length = 99.0; table.update(edited)
+        table.remove(names[0]); table.remove(names[7])
+        moved = table[names[2]]; table.remove(moved.name); table.add(moved)
+        table.add(Room("Added", 5, 4, 3, 7, 0, 20))
+        assert store.sync(table) == 5 and store.revision == revision + 1
+        assert store.sync(table, project_name="Renamed") == 0 and store.revision == revision + 2
+    assert names_on_disk(path) == table.names() == [n for n in names if n not in (names[0], names[2], names[7])] + [names[2], "Added"]
+    loaded, metadata = read_project_file(path)
+    assert [room.to_dict() for room in loaded] == [room.to_dict() for room in table] and metadata["project_name"] == "Renamed"
+    assert loaded[names[4]].length == 99.0
+
+
+def test_a_different_table_is_written_in_full(tmp_path):
+    path = str(tmp_path / "project.fmproj")
+    with ProjectStore.create(path, generate_synthetic_project(10, seed=1)) as store:
+        other = RoomTable(generate_synthetic_project(4, seed=2))
+        assert store.sync(other) == 4
+    assert names_on_disk(path) == other.names()
+
+
+def test_create_replaces_an_existing_project_only_when_complete(tmp_path):
+    path = str(tmp_path / "project.fmproj"); original = generate_synthetic_project(5, seed=1)
+    write_project_db(path, original)
+    def failing_rooms():
+        yield from generate_synthetic_project(5, seed=2)
+        raise RuntimeError("disk full")
+    with pytest.raises(RuntimeError): write_project_db(path, failing_rooms())
+    assert names_on_disk(path) == [room.name for room in original]
+    write_project_db(path, generate_synthetic_project(3, seed=2), project_name="New")
+    loaded, metadata = read_project_file(path)
+    assert len(loaded) == 3 and metadata["project_name"] == "New"
+    assert sorted(os.listdir(tmp_path)) == ["project.fmproj"]
@@ -0,0 +1,70 @@
+import pytest
+
+import clean_agent_calculator
+from clean_agent_calculator import ResultCache, Room, RoomTable, TaskCancelled, build_calculation_report, generate_project_bom, generate_synthetic_project
+
+TIMESTAMP = "2024-01-01 00:00:00"
+
+
+def assert_matches_fresh(cache, table):
+    """The cached report and BOM must equal a from-scratch calculation of the same rooms."""
+    rooms = list(table)
+    assert cache.report(table, "P", "C", TIMESTAMP).to_text() == build_calculation_report(rooms, "P", "C", TIMESTAMP).to_text()
+    bom_per_room, project_bom = cache.bom(table)
+    fresh_per_room, fresh_project = generate_project_bom(rooms)
+    assert bom_per_room == fresh_per_room
+    # Incremental updates may append a part that dropped to zero and came back; totals per part are what must agree.
+    assert {item["part_number"]: item for item in project_bom} == {item["part_number"]: item for item in fresh_project}
+
+
+def edited(room, **changes):
+    data = room.to_dict(); data.update(changes); return Room(**data)
+
+
+def cancel_at_first_progress(done, total=None):
+    raise TaskCancelled()
+
+
+@pytest.fixture
+def table():
+    return RoomTable(generate_synthetic_project(3000, seed=1))
+
+
+def test_incremental_edits_match_fresh(table):
+    cache = ResultCache(); assert_matches_fresh(cache, table)
+    names = table.names()
+    for name in names[:50]: table.update(edited(table[name], length=table[name].length + 1))
+    for name in names[50:60]: table.update(edited(table[name], agent="Novec 1230 (FK-5-1-12)"))
+    table.remove_many(names[60:80])
+    table.extend(edited(room, name=f"New {room.name}") for room in generate_synthetic_project(30, seed=2))
+    assert_matches_fresh(cache, table)
+    # Removing and re-adding a room moves it to the end of the table, and of its agent's section.
+    room = table[names[100]]; table.remove(room.name); table.add(room)
+    assert_matches_fresh(cache, table)
+
+
+def test_cancelled_incremental_sync_recovers(table):
+    cache = ResultCache(); assert_matches_fresh(cache, table)
+    # As in the GUI: a Calculate on a copy with many new rooms is cancelled by a second Calculate on a later copy.
+    table.extend(edited(room, name=f"Extra {room.name}") for room in generate_synthetic_project(2500, seed=3))
+    first = table.copy()
+    with pytest.raises(TaskCancelled): cache.report(first, progress=cancel_at_first_progress)
+    table.update(edited(table[table.names()[0]], height=9.5))
+    assert_matches_fresh(cache, table.copy())
+
+
+def test_cancelled_full_sync_recovers(table):
+    cache = ResultCache()
+    with pytest.raises(TaskCancelled): cache.report(table, progress=cancel_at_first_progress)
+    assert_matches_fresh(cache, table)
+    table.remove_many(table.names()[:1500])
+    assert_matches_fresh(cache, table)
+
+
+def test_batch_and_scalar_full_sync_agree(table, monkeypatch):
+    pytest.importorskip("numpy")
+    batch = ResultCache(); batch_report = batch.report(table, "P", "C", TIMESTAMP).to_text(); batch_bom = batch.bom(table)
+    monkeypatch.setattr(clean_agent_calculator, "RESULT_CACHE_BATCH_ROOMS", len(table) + 1)
+    scalar = ResultCache()
+    assert scalar.report(table, "P", "C", TIMESTAMP).to_text() == batch_report
+    assert scalar.bom(table) == batch_bom
@@ -0,0 +1,69 @@
+import pytest
+
+from clean_agent_calculator import DuplicateRoomError, Room, RoomTable
+
+
+def room(name, length=5.0, agent="FM-200 (HFC-227ea)"):
+    return Room(name, length, 4, 3, 7, 0, 20, agent=agent)
+
+
+@pytest.fixture
+def table():
+    return RoomTable([room(f"R{i}", length=i + 1) for i in range(8)])
+
+
+def test_removed_rows_are_hidden_before_and_after_compaction(table):
+    table.remove("R2")  # one tombstone: below the compaction threshold
+    assert table._dead == 1 and "R2" not in table and len(table) == 7
+    assert [name for name, in table.iter_fields("name")] == [r.name for r in table] == ["R0", "R1", "R3", "R4", "R5", "R6", "R7"]
+    assert table.remove_many(["R0", "R5", "missing"]) == 2  # three of eight rows dead: compacts
+    assert table._dead == 0 and len(table._names) == len(table) == 5
+    assert [(name, length) for name, length in table.iter_fields("name", "length")] == [("R1", 2), ("R3", 4), ("R4", 5), ("R6", 7), ("R7", 8)]
+    assert [table.row_of(name) for name in table.names()] == list(range(5))
+    assert table["R6"].to_dict() == room("R6", length=7).to_dict()
+
+
+def test_columns_compact_and_keep_coded_categories(table):
+    table.update(room("R1", length=20, agent="Novec 1230 (FK-5-1-12)")); table.remove("R0")
+    columns = table.columns()
+    assert table._dead == 0 and columns["name"] == ["R1", "R2", "R3", "R4", "R5", "R6", "R7"]
+    codes, categories = columns["agent"]
+    assert [categories[code] for code in codes] == ["Novec 1230 (FK-5-1-12)"] + ["FM-200 (HFC-227ea)"] * 6
+    assert list(columns["length"]) == [20, 3, 4, 5, 6, 7, 8]
+
+
+def test_readding_a_removed_name_appends_it(table):
+    table.remove("R3"); table.add(room("R3", length=30))
+    assert table.names()[-1] == "R3" and table["R3"].length == 30
+    with pytest.raises(ValueError): table.add(room("R3"))
+
+
+def test_extend_is_all_or_nothing(table):
+    version = table.version
+    with pytest.raises(DuplicateRoomError) as error: table.extend([room("New"), room("R4"), room("New")])
+    assert error.value.names == ["R4", "New"]
+    assert "New" not in table and len(table) == 8 and table.version == version
+
+
+def test_changes_since_reports_each_name_once_with_whether_it_was_added(table):
+    base = table.version
+    assert table.changes_since(base) == {}
+    table.update(room("R1", length=10)); table.remove("R2"); table.add(room("New")); table.remove("R3"); table.add(room("R3"))
+    assert table.changes_since(base) == {"R1": False, "R2": False, "New": True, "R3": True}
+    assert table.changes_since(table.version) == {}
+    assert table.changes_since(table.version + 1) is None
+    assert table.changes_since(RoomTable().version) == {**{f"R{i}": True for i in range(8)}, "New": True}
+    assert table.changes_since(0) is None
+
+
+def test_changes_since_gives_up_once_the_log_is_trimmed(table):
+    table.CHANGE_LOG_LIMIT = 4; base = table.version
+    for length in range(10): table.update(room("R0", length=length + 1))
+    assert table.changes_since(base) is None
+    assert table.changes_since(table.version - 1) == {"R0": False}
+
+
+def test_copy_is_independent_but_shares_identity(table):
+    other = table.copy(); other.remove("R0"); other.update(room("R1", length=99))
+    assert "R0" in table and table["R1"].length == 2
+    assert other.uid is table.uid and other.changes_since(table.version) == {"R0": False, "R1": False}
@@ -0,0 +1,37 @@
+import re
+
+import pytest
+
+from clean_agent_calculator import ServiceError, room_from_request
+
+ROOM = {"name": "Server", "length": 5, "width": 4, "height": 3, "design_concentration": 7, "altitude": 0, "temperature": 20}
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("altitude", 50000, "rooms[0].altitude: must be between -500 and 11000"),
+    ("temperature", -273, "rooms[0].temperature: must be between -60 and 150"),
+    ("length", 0, "rooms[0].length: must be greater than 0"),
+    ("design_concentration", -7, "rooms[0].design_concentration: must be greater than 0"),
+    ("height", "nan", "rooms[0].height: invalid number 'nan'"),
+])
+def test_out_of_range_rooms_are_rejected(field, value, message):
+    with pytest.raises(ServiceError, match=re.escape(message)) as error:
+        room_from_request(dict(ROOM, **{field: value}))
+    assert error.value.status == 400
+
+
+def test_limits_are_inclusive():
+    room = room_from_request(dict(ROOM, altitude=11000, temperature=-60))
+    assert room.calculate_required_agent()[0] > 0
+
+
+@pytest.mark.parametrize("agent, oem", [("FM-200 (HFC-227ea)", "Acme"), ("Novec 1230 (FK-5-1-12)", "Viking"), ("FM-200 (HFC-227ea)", ["Viking"])])
+def test_oems_without_hardware_for_the_agent_are_rejected(agent, oem):
+    with pytest.raises(ServiceError, match=re.escape("rooms[0].oem: no ")) as error:
+        room_from_request(dict(ROOM, agent=agent, oem=oem))
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("agent, oem", [("FM-200 (HFC-227ea)", "Kidde"), ("FM-200 (HFC-227ea)", ""), ("Novec 1230 (FK-5-1-12)", "")])
+def test_supported_or_blank_oems_are_accepted(agent, oem):
+    assert room_from_request(dict(ROOM, agent=agent, oem=oem)).oem == oem